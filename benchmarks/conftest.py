@@ -0,0 +1,36 @@
+# Shared setup for the benchmark suite.
+# Rendering runs headless through SDL's dummy drivers, and results are stored
+# next to this file in baselines/ so they can be committed and compared:
+#
+#   python -m pytest benchmarks --benchmark-save=baseline
+#   python -m pytest benchmarks --benchmark-compare
+#
+# The comparison fails past the threshold set in pytest.ini next to this file.
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # No window, no display server needed
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT) # The game modules live at the top of the repository
+
+DEFAULT_STORAGE = "file://./.benchmarks" # pytest-benchmark's own default
+
+def pytest_addoption(parser):
+    parser.addini("benchmark_compare_fail", "regression threshold used by --benchmark-compare, e.g. min:25%")
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Keep saved runs in the repository instead of the current directory
+    if getattr(config.option, "benchmark_storage", None) == DEFAULT_STORAGE:
+        config.option.benchmark_storage = "file://" + os.path.join(HERE, "baselines")
+    # Compare against the threshold from pytest.ini unless one is given on the command line
+    threshold = config.getini("benchmark_compare_fail")
+    if getattr(config.option, "benchmark_compare", None) and not config.option.benchmark_compare_fail and threshold:
+        from pytest_benchmark.utils import parse_compare_fail
+        config.option.benchmark_compare_fail = [parse_compare_fail(threshold)]
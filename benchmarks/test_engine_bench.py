@@ -0,0 +1,66 @@
+# Benchmarks of the pygame-free game model.
+# Every benchmark runs a fixed number of rounds spread over about four
+# seconds, so the fastest round is found even on a machine whose speed drifts
+# for a few seconds at a time.
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from grid_engine import MINES, Grid_snifferGame
+from grid_chunks import ChunkedGame
+
+@pytest.mark.parametrize("density", [0.12, 0.2])
+@pytest.mark.parametrize("size", [9, 16, 100, 500])
+def test_create_board(benchmark, size, density):
+    game = Grid_snifferGame(size, round(size * size * density), seed=1)
+    # Boards below 500 take well under a millisecond, so each round builds several
+    iterations = 1 if size >= 500 else 10 if size >= 100 else 20
+    board = benchmark.pedantic(game.create_board, rounds=3000, iterations=iterations, warmup_rounds=5)
+    assert sum(value == MINES for row in board for value in row) == game.bombs
+
+@pytest.mark.parametrize("size", [16, 100, 500])
+def test_reveal_cell_empty_board(benchmark, size):
+    # Worst case cascade: without mines one click opens the whole board.
+    # Each round opens enough fresh boards to take more than a millisecond
+    count = max(1, 10000 // (size * size))
+    rounds = {16: 500, 100: 1500, 500: 100}[size]
+
+    def setup():
+        return ([Grid_snifferGame(size, 0, seed=1) for _ in range(count)],), {}
+
+    def reveal_all(games):
+        return [game.reveal_cell(size // 2, size // 2) for game in games]
+
+    results = benchmark.pedantic(reveal_all, setup=setup, rounds=rounds)
+    assert all(len(cells) == size * size for cells in results)
+
+def test_is_victory(benchmark):
+    game = Grid_snifferGame(16, 40, seed=1)
+    assert benchmark.pedantic(game.is_victory, rounds=3000, iterations=10000, warmup_rounds=5) is False
+
+def test_count_neighbouring_bombs(benchmark):
+    # One pass over every cell of a Hard board
+    game = Grid_snifferGame(16, 40, seed=1)
+    cells = [(r, c) for r in range(16) for c in range(16)]
+
+    def count_all():
+        return sum(game.count_neighbouring_bombs(r, c, game.board) for r, c in cells)
+
+    assert benchmark.pedantic(count_all, rounds=3000, iterations=5, warmup_rounds=5) > 0
+
+def test_chunked_dig(benchmark):
+    # Opening a region of a fresh endless world, chunk generation included
+    def setup():
+        game = ChunkedGame(10**6, 0.1, seed=1)
+        for r in range(500000, 500200):
+            if game.value(r, 500000) == 0:
+                return (game, r), {}
+
+    result = benchmark.pedantic(lambda game, r: game.dig(r, 500000), setup=setup, rounds=350)
+    assert result.cells
+
+def test_create_huge_board(benchmark):
+    # The 4096 x 4096 target, which should build well under a second
+    game = Grid_snifferGame(4096, round(4096 * 4096 * 0.15), seed=1)
+    board = benchmark.pedantic(game.create_board, rounds=20, iterations=1)
+    assert len(board) == 4096
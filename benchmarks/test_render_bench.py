@@ -0,0 +1,55 @@
+# Benchmarks of board drawing, rendered headlessly with SDL's dummy video driver.
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pygame = pytest.importorskip("pygame")
+
+import grid_sniffer
+from grid_engine import Grid_snifferGame
+
+@pytest.fixture(scope="module")
+def screen():
+    pygame.display.init()
+    pygame.font.init()
+    yield pygame.display.set_mode((grid_sniffer.MAX_VIEW_SIZE, grid_sniffer.MAX_VIEW_SIZE + 50))
+    pygame.display.quit()
+
+def revealed_game(size, bombs):
+    """
+    Returns a game with every cell shown, so all tile kinds get drawn.
+    """
+    game = Grid_snifferGame(size, bombs, seed=1)
+    game.visible = [[True] * size for _ in range(size)]
+    return game
+
+def test_draw_board_hard(benchmark, screen):
+    game = revealed_game(16, 40)
+    bomb_colors = {}
+    grid_sniffer.draw_board(screen, game, bomb_colors) # Build the tile atlas outside the timing
+    benchmark.pedantic(grid_sniffer.draw_board, (screen, game, bomb_colors), rounds=3000, warmup_rounds=5)
+
+@pytest.mark.parametrize("zoom", [0, len(grid_sniffer.ZOOM_LEVELS) - 1])
+def test_draw_board_camera(benchmark, screen, zoom):
+    # A board far bigger than the window: only the cells in view are drawn
+    game = revealed_game(1000, 150000)
+    camera = grid_sniffer.Camera(game.size, grid_sniffer.MAX_VIEW_SIZE, grid_sniffer.MAX_VIEW_SIZE, zoom)
+    camera.center_on(500, 500)
+    bomb_colors = {}
+    grid_sniffer.draw_board(screen, game, bomb_colors, camera)
+    benchmark.pedantic(grid_sniffer.draw_board, (screen, game, bomb_colors, camera), rounds=2000 if zoom == 0 else 100, warmup_rounds=1)
+
+def test_renderer_scroll(benchmark, screen):
+    # One frame of panning: shift the cached view and paint the exposed strips
+    game = revealed_game(1000, 150000)
+    camera = grid_sniffer.Camera(game.size, grid_sniffer.MAX_VIEW_SIZE, grid_sniffer.MAX_VIEW_SIZE)
+    camera.center_on(500, 500)
+    renderer = grid_sniffer.BoardRenderer(game, camera)
+    step = [grid_sniffer.PAN_SPEED]
+
+    def pan():
+        dx, dy = camera.pan(step[0], step[0])
+        if not dx:
+            step[0] = -step[0] # Bounce off the board edge
+        renderer.scroll(screen, dx, dy)
+
+    benchmark.pedantic(pan, rounds=1500, iterations=5, warmup_rounds=5) # A single pan takes well under a millisecond
@@ -0,0 +1,120 @@
+# Resource manager for Grid Sniffer.
+# Caches font objects by (name, size, bold), remembers where each system font
+# lives in a small JSON file so later runs skip the system font scan, and runs
+# the slow asset loading (mixer, sounds, images) on a background thread while
+# the menu is already on screen.
+import json
+import os
+import threading
+import time
+
+import pygame
+
+# Resolved font paths, kept between runs. Delete it after installing new fonts.
+FONT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "grid_sniffer", "fonts.json")
+
+class ResourceManager:
+    """
+    Loads and caches fonts and game assets.
+    Fonts can be requested from any thread once pygame.font is initialized.
+    Assets come from a loader function run by load_in_background; wait()
+    returns them, blocking only if they are not ready yet.
+    """
+    def __init__(self, cache_path=FONT_CACHE_PATH):
+        self.cache_path = cache_path
+        self.font_paths = self.read_cache() # "name:bold" -> font file path, or None if not installed
+        self.fonts = {} # (name, size, bold) -> pygame.font.Font
+        self.lock = threading.Lock() # pygame's system font table is not thread-safe
+        self.assets = {} # Filled in by the background loader
+        self.ready = threading.Event() # Set once the loader has finished
+        self.thread = None
+        self.error = None # Exception raised by the loader, re-raised by wait()
+        self.load_seconds = None # How long the background loading took
+
+    def read_cache(self):
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {} # No cache yet, or a broken one: resolve the fonts again
+
+    def write_cache(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = self.cache_path + ".tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self.font_paths, f, indent=2)
+            os.replace(temp_path, self.cache_path) # Never leave a half written cache behind
+        except OSError:
+            pass # The cache only saves time, the game works without it
+
+    def font_path(self, name, bold=False):
+        """
+        Returns the file path of a system font, or None if it is not installed.
+        Only the first lookup of a name scans the system fonts; the answer is
+        kept on disk for later runs.
+        """
+        key = f"{name}:{'bold' if bold else 'regular'}"
+        with self.lock:
+            if key in self.font_paths:
+                path = self.font_paths[key]
+                if path is None or os.path.exists(path):
+                    return path
+            path = pygame.font.match_font(name, bold=bold)
+            self.font_paths[key] = path
+            self.write_cache()
+            return path
+
+    def font(self, name, size, bold=False):
+        """
+        Returns a font object, creating it only the first time a (name, size,
+        bold) combination is used. Missing fonts fall back to pygame's default.
+        """
+        key = (name, size, bold)
+        font = self.fonts.get(key)
+        if font is None:
+            path = self.font_path(name)
+            with self.lock: # Opening a font is not thread-safe either
+                font = self.fonts.get(key)
+                if font is None:
+                    font = pygame.font.Font(path, size)
+                    if bold:
+                        font.set_bold(True)
+                    self.fonts[key] = font
+        return font
+
+    def load_in_background(self, loader):
+        """
+        Runs loader(self) on a daemon thread; the dict it returns becomes the assets.
+        """
+        self.thread = threading.Thread(target=self.run_loader, args=(loader,), name="asset-loader", daemon=True)
+        self.thread.start()
+
+    def run_loader(self, loader):
+        start = time.perf_counter()
+        try:
+            self.assets.update(loader(self))
+        except Exception as error:
+            self.error = error
+        finally:
+            self.load_seconds = time.perf_counter() - start
+            self.ready.set()
+
+    def wait(self):
+        """
+        Returns the assets, waiting for the background loader if needed.
+        Without a background loader, nothing has been loaded and {} is returned.
+        """
+        if self.thread is not None:
+            self.ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self.assets
+
+    def get(self, name, default=None):
+        """
+        Returns one asset without waiting, or default while loading is still running.
+        """
+        if not self.ready.is_set():
+            return default
+        return self.assets.get(name, default)
@@ -0,0 +1,182 @@
+# Monte Carlo difficulty benchmark for Grid Sniffer.
+# Plays thousands of seeded games per difficulty with an automated strategy,
+# spread over worker processes, and reports how hard each board really is.
+#
+#   python grid_benchmark.py --games 5000
+#   python grid_benchmark.py --size 30 --density 0.2 --strategy basic --workers 8
+#   python grid_benchmark.py --preset Hard --games 100 --record runs/  # keep every game for replay
+import argparse
+import contextlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from grid_engine import DIFFICULTIES, NOTHING, BOOM, Grid_snifferGame, game_seed
+import grid_engine
+from grid_save import GameRecorder
+from grid_profiler import percentile
+import grid_solver
+
+# Strategies by name: the engine's plus the solver
+STRATEGIES = dict(grid_engine.STRATEGIES, **grid_solver.strategies())
+
+CHUNK_SIZE = 250 # Games per work item sent to a worker process
+
+def play_chunk(size, bombs, strategy_name, seed, start, count, record_dir=None):
+    """
+    Plays games number start .. start + count - 1 of a benchmark run.
+    Every game is seeded from (seed, game number), so the results do not
+    depend on how many workers there are or which worker runs the chunk.
+    With record_dir, each game is also saved there as game-<number>.gsr.
+    Returns the raw totals and the list of per-dig reveal times.
+    """
+    strategy = STRATEGIES[strategy_name]
+    wins = 0
+    moves = 0
+    safe_digs = 0 # Digs that did not hit a mine, the ones that can cascade
+    revealed = 0
+    reveal_times = [] # Seconds spent in each dig call
+    clock = time.perf_counter
+    cpu_start = time.process_time() # CPU time of this worker, for games/sec per core
+    for index in range(start, start + count):
+        game_seed_value = game_seed(seed, index)
+        game = Grid_snifferGame(size, bombs, game_seed_value)
+        rng = random.Random(game_seed_value)
+        if record_dir is not None:
+            file = open(os.path.join(record_dir, f"game-{index}.gsr"), "wb")
+        else:
+            file = contextlib.nullcontext() # Nothing to record
+        with file as f:
+            recorder = GameRecorder(game, f) if f is not None else None
+            while not game.game_over:
+                action, r, c = strategy(game, rng)
+                moves += 1
+                if action == "flag":
+                    result = game.toggle_flag(r, c)
+                else:
+                    t = clock()
+                    result = game.dig(r, c)
+                    reveal_times.append(clock() - t)
+                    if result.event != BOOM:
+                        safe_digs += 1
+                        revealed += len(result.cells) # Mines are not part of a cascade
+                if recorder is not None and result.event != NOTHING:
+                    recorder.record(action, r, c, tick=moves) # Ticks count moves, wall time means nothing here
+        wins += game.victory
+    return {
+        "games": count,
+        "wins": wins,
+        "moves": moves,
+        "safe_digs": safe_digs,
+        "revealed": revealed,
+        "cpu_seconds": time.process_time() - cpu_start,
+        "reveal_times": reveal_times,
+    }
+
+def run_benchmark(size, bombs, games, strategy_name="basic", seed=0, workers=None, executor=None, record_dir=None):
+    """
+    Plays the given number of games on a size x size board with the given
+    number of bombs and returns a dict of summary statistics.
+    Pass an existing executor to reuse worker processes between runs, and
+    record_dir to save every game as a replayable recording.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = [(start, min(CHUNK_SIZE, games - start)) for start in range(0, games, CHUNK_SIZE)]
+    wall_start = time.perf_counter()
+    if workers == 1:
+        parts = [play_chunk(size, bombs, strategy_name, seed, start, count, record_dir) for start, count in chunks]
+    else:
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [
+                executor.submit(play_chunk, size, bombs, strategy_name, seed, start, count, record_dir)
+                for start, count in chunks
+            ]
+            parts = [future.result() for future in futures]
+        finally:
+            if own_executor:
+                executor.shutdown()
+    wall_seconds = time.perf_counter() - wall_start
+
+    # Merge the totals from every chunk
+    totals = {key: sum(part[key] for part in parts) for key in ("games", "wins", "moves", "safe_digs", "revealed", "cpu_seconds")}
+    reveal_times = sorted(t for part in parts for t in part["reveal_times"])
+    return {
+        "size": size,
+        "bombs": bombs,
+        "strategy": strategy_name,
+        "seed": seed,
+        "workers": workers,
+        "games": totals["games"],
+        "win_rate": totals["wins"] / totals["games"] if totals["games"] else 0.0,
+        "avg_cascade": totals["revealed"] / totals["safe_digs"] if totals["safe_digs"] else 0.0,
+        "moves_per_game": totals["moves"] / totals["games"] if totals["games"] else 0.0,
+        "reveal_us_p50": percentile(reveal_times, 0.50) * 1e6,
+        "reveal_us_p90": percentile(reveal_times, 0.90) * 1e6,
+        "reveal_us_p99": percentile(reveal_times, 0.99) * 1e6,
+        "wall_seconds": wall_seconds,
+        "games_per_sec": totals["games"] / wall_seconds if wall_seconds else 0.0,
+        "games_per_sec_per_core": totals["games"] / totals["cpu_seconds"] if totals["cpu_seconds"] else 0.0,
+    }
+
+def print_results(results):
+    """
+    Prints benchmark results as an aligned text table.
+    """
+    header = f"{'board':>14} {'games':>7} {'win %':>7} {'cascade':>8} {'p50 us':>8} {'p90 us':>8} {'p99 us':>8} {'games/s':>9} {'/core':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results:
+        print(
+            f"{name:>14} {result['games']:>7} {result['win_rate'] * 100:>6.1f}% {result['avg_cascade']:>8.2f} "
+            f"{result['reveal_us_p50']:>8.1f} {result['reveal_us_p90']:>8.1f} {result['reveal_us_p99']:>8.1f} "
+            f"{result['games_per_sec']:>9.0f} {result['games_per_sec_per_core']:>8.0f}"
+        )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo difficulty benchmark for Grid Sniffer.")
+    parser.add_argument("--games", type=int, default=2000, help="games to play per board (default: 2000)")
+    parser.add_argument("--preset", action="append", choices=list(DIFFICULTIES), help="difficulty preset to run, can be repeated (default: all)")
+    parser.add_argument("--size", type=int, help="custom board size, runs instead of the presets")
+    parser.add_argument("--bombs", type=int, help="number of bombs for the custom board")
+    parser.add_argument("--density", type=float, help="mine density for the custom board, used when --bombs is not given")
+    parser.add_argument("--strategy", choices=list(STRATEGIES), default="basic", help="strategy that plays the games (default: basic)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed, the same seed replays the same games (default: 0)")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    parser.add_argument("--record", metavar="DIR", help="save every game to DIR/<board>/game-<n>.gsr for replay with grid_save.py")
+    args = parser.parse_args(argv)
+
+    if args.workers is None or args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.size is not None:
+        if args.bombs is None and args.density is None:
+            parser.error("--size needs --bombs or --density")
+        bombs = args.bombs if args.bombs is not None else round(args.size * args.size * args.density)
+        boards = [(f"{args.size}x{args.size}/{bombs}", (args.size, bombs))]
+    else:
+        names = args.preset or list(DIFFICULTIES)
+        boards = [(name, DIFFICULTIES[name]) for name in names]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for name, (size, bombs) in boards:
+            record_dir = None
+            if args.record:
+                record_dir = os.path.join(args.record, name.replace("/", "-"))
+                os.makedirs(record_dir, exist_ok=True)
+            result = run_benchmark(size, bombs, args.games, args.strategy, args.seed, args.workers, executor, record_dir)
+            results.append((name, result))
+    print(f"strategy={args.strategy} seed={args.seed} workers={args.workers}")
+    print_results(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({name: result for name, result in results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# Chunked sparse board for huge Grid Sniffer worlds.
+# The board is split into 64x64 chunks that are only created when something
+# touches them. A chunk's mines come from a hash of (seed, chunk position), so
+# any chunk can be rebuilt the same way at any time, and memory grows with the
+# explored area (one byte per cell of a touched chunk) instead of the board area.
+import hashlib
+import random
+import time
+from collections import deque
+
+try:
+    import numpy as np # Optional, makes counting a chunk's neighbours much faster
+except ImportError:
+    np = None # Fall back to counting in pure Python
+
+from grid_engine import MINES, MoveResult, NOTHING, DIG, BOOM, FLAG, UNFLAG
+
+CHUNK_BITS = 6
+CHUNK = 1 << CHUNK_BITS # Chunk width and height in cells (64)
+CHUNK_MASK = CHUNK - 1
+
+# Bit fields of a cell's state byte
+MINE = 1 # The cell holds a mine
+REVEALED = 2 # The cell was dug
+FLAGGED = 4 # The player put a flag on the cell
+COUNTED = 8 # The neighbour count in the high nibble is valid
+COUNT_SHIFT = 4 # Neighbour count (0-8) is stored in bits 4-7
+
+MAX_REVEAL = 50000 # Largest cascade opened by one move, the rest opens on the next click
+
+MINE_BITS = bytes(value & MINE for value in range(256)) # bytes.translate table keeping only the mine bit
+PADDED = CHUNK + 2 # Width of a chunk's mine grid with a one cell border from its neighbours
+
+# (row step, col step, flat step) to the 8 neighbours of a cell inside one chunk
+NEIGHBOUR_STEPS = [
+    (dr, dc, (dr << CHUNK_BITS) + dc)
+    for dr in (-1, 0, 1)
+    for dc in (-1, 0, 1)
+    if dr or dc
+]
+
+def chunk_seed(seed, cr, cc):
+    """
+    Returns the deterministic seed of the chunk at chunk row cr, column cc.
+    """
+    digest = hashlib.blake2b(f"{seed}:{cr}:{cc}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+class _StateView:
+    """
+    Read-only rows of one state bit, so game.visible[r][c] and
+    game.flagged[r][c] work like on Grid_snifferGame.
+    """
+    def __init__(self, game, bit):
+        self.game = game
+        self.bit = bit
+
+    def __getitem__(self, r):
+        return _StateRow(self.game, r, self.bit)
+
+class _StateRow:
+    def __init__(self, game, r, bit):
+        self.game = game
+        self.r = r
+        self.bit = bit
+
+    def __getitem__(self, c):
+        return bool(self.game.peek(self.r, c) & self.bit)
+
+class _BoardView:
+    """
+    Read-only rows of cell values, so game.board[r][c] gives MINES or the
+    neighbour count like on Grid_snifferGame.
+    """
+    def __init__(self, game):
+        self.game = game
+
+    def __getitem__(self, r):
+        return _BoardRow(self.game, r)
+
+class _BoardRow:
+    def __init__(self, game, r):
+        self.game = game
+        self.r = r
+
+    def __getitem__(self, c):
+        return self.game.value(self.r, c)
+
+class ChunkedGame:
+    """
+    Game on a size x size board stored as lazily generated chunks.
+    Each chunk gets round(density * cells) mines. Supports the same dig,
+    toggle_flag and visible/flagged/board access as Grid_snifferGame;
+    there is no victory on a board this big, only survival.
+    """
+    def __init__(self, size, density, seed=0):
+        self.size = size # Board is size x size cells, e.g. 10**6
+        self.density = density # Fraction of cells holding a mine
+        self.seed = seed # The same seed always gives the same world
+        self.chunks = {} # (chunk row, chunk col) -> bytearray of CHUNK * CHUNK state bytes
+        self.counted = set() # Chunks whose neighbour counts are filled in
+        self.visible = _StateView(self, REVEALED)
+        self.flagged = _StateView(self, FLAGGED)
+        self.board = _BoardView(self)
+        self.revealed_safe = 0 # Number of non-mine cells revealed so far
+        self.flag_count = 0 # Number of flags currently placed
+        self.game_over = False # True once a mine is dug
+        self.victory = False # Never set, kept for compatibility with Grid_snifferGame
+        self.start_time = time.time() # Time when the game started
+        self.move_count = 0 # Number of moves that changed the board
+        self.last_result = None # MoveResult of the latest move that changed the board
+
+    def chunk(self, cr, cc):
+        """
+        Returns the state bytes of a chunk, generating its mines on first use.
+        """
+        cells = self.chunks.get((cr, cc))
+        if cells is None:
+            cells = self.chunks[(cr, cc)] = self.generate_chunk(cr, cc)
+        return cells
+
+    def generate_chunk(self, cr, cc):
+        """
+        Places the mines of one chunk from its deterministic seed. Cells of
+        edge chunks that fall outside the board never get a mine.
+        NumPy and pure Python place different mines for the same seed.
+        """
+        rows = min(CHUNK, self.size - cr * CHUNK)
+        cols = min(CHUNK, self.size - cc * CHUNK)
+        if rows == CHUNK and cols == CHUNK:
+            positions = range(CHUNK * CHUNK)
+        else:
+            positions = [(r << CHUNK_BITS) | c for r in range(rows) for c in range(cols)]
+        cells = bytearray(CHUNK * CHUNK)
+        mines = round(self.density * len(positions))
+        if np is not None:
+            rng = np.random.default_rng(chunk_seed(self.seed, cr, cc))
+            picked = np.asarray(positions)[rng.choice(len(positions), mines, replace=False)]
+            np.frombuffer(cells, dtype=np.uint8)[picked] = MINE
+        else:
+            for i in random.Random(chunk_seed(self.seed, cr, cc)).sample(positions, mines):
+                cells[i] = MINE
+        return cells
+
+    def peek(self, r, c):
+        """
+        Returns the state byte of a cell without creating its chunk; cells of
+        untouched chunks read as hidden and unflagged (their mine bit is unknown).
+        """
+        cells = self.chunks.get((r >> CHUNK_BITS, c >> CHUNK_BITS))
+        if cells is None:
+            return 0
+        return cells[((r & CHUNK_MASK) << CHUNK_BITS) | (c & CHUNK_MASK)]
+
+    def counted_chunk(self, cr, cc):
+        """
+        Returns the state bytes of a chunk with every cell's neighbour count
+        filled in. Counting needs the border cells of the 8 surrounding
+        chunks, so their mines are generated too.
+        """
+        cells = self.chunk(cr, cc)
+        if (cr, cc) in self.counted:
+            return cells
+        last = (self.size - 1) >> CHUNK_BITS # Last chunk row/col inside the board
+
+        # Mine grid of the chunk plus a one cell border taken from its neighbours
+        padded = bytearray(PADDED * PADDED)
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if not (0 <= cr + dr <= last and 0 <= cc + dc <= last):
+                    continue # Outside the board there are no mines
+                source = self.chunk(cr + dr, cc + dc)
+                src_rows = range(CHUNK) if dr == 0 else [CHUNK - 1 if dr < 0 else 0]
+                col_lo, col_hi = (0, CHUNK) if dc == 0 else ((CHUNK - 1, CHUNK) if dc < 0 else (0, 1))
+                dest_col = col_lo + 1 if dc == 0 else (0 if dc < 0 else PADDED - 1)
+                for src_row in src_rows:
+                    dest_row = src_row + 1 if dr == 0 else (0 if dr < 0 else PADDED - 1)
+                    start = src_row << CHUNK_BITS
+                    dest = dest_row * PADDED + dest_col
+                    padded[dest:dest + col_hi - col_lo] = source[start + col_lo:start + col_hi].translate(MINE_BITS)
+
+        if np is not None:
+            grid = np.frombuffer(padded, dtype=np.uint8).reshape(PADDED, PADDED)
+            rows = grid[:, :-2] + grid[:, 1:-1] + grid[:, 2:]
+            counts = rows[:-2] + rows[1:-1] + rows[2:] - grid[1:-1, 1:-1] # Don't count the cell itself
+            state = np.frombuffer(cells, dtype=np.uint8)
+            state[:] = (state & 0x0F) | COUNTED | (counts.ravel() << COUNT_SHIFT)
+        else:
+            for lr in range(CHUNK):
+                top = lr * PADDED
+                for lc in range(CHUNK):
+                    j = top + lc
+                    count = (padded[j] + padded[j + 1] + padded[j + 2]
+                             + padded[j + PADDED] + padded[j + PADDED + 2]
+                             + padded[j + 2 * PADDED] + padded[j + 2 * PADDED + 1] + padded[j + 2 * PADDED + 2])
+                    i = (lr << CHUNK_BITS) | lc
+                    cells[i] = (cells[i] & 0x0F) | COUNTED | (count << COUNT_SHIFT)
+        self.counted.add((cr, cc))
+        return cells
+
+    def neighbour_count(self, r, c):
+        """
+        Returns the number of mines around (r, c).
+        """
+        cells = self.counted_chunk(r >> CHUNK_BITS, c >> CHUNK_BITS)
+        return cells[((r & CHUNK_MASK) << CHUNK_BITS) | (c & CHUNK_MASK)] >> COUNT_SHIFT
+
+    def value(self, r, c):
+        """
+        Returns MINES for a mine, otherwise the number of neighbouring mines.
+        """
+        if self.chunk(r >> CHUNK_BITS, c >> CHUNK_BITS)[((r & CHUNK_MASK) << CHUNK_BITS) | (c & CHUNK_MASK)] & MINE:
+            return MINES
+        return self.neighbour_count(r, c)
+
+    def reveal_cell(self, r, c):
+        """
+        Reveals a cell and flood fills the empty region around it, crossing
+        chunk borders as needed. A cascade stops after MAX_REVEAL cells; the
+        revealed '0' cells at its edge keep opening when clicked again.
+        Returns the list of newly revealed (row, col) cells.
+        """
+        size = self.size
+        revealed = []
+        stack = deque([(r, c)]) # Breadth first keeps the opened area compact, touching fewer chunks
+        first = True # The clicked cell may be a revealed '0' whose cascade was cut off
+        key = None # Chunk of the previous cell, most steps stay inside one chunk
+        cells = None
+        while stack and len(revealed) < MAX_REVEAL:
+            r, c = stack.popleft()
+            if (r >> CHUNK_BITS, c >> CHUNK_BITS) != key:
+                key = (r >> CHUNK_BITS, c >> CHUNK_BITS)
+                cells = self.counted_chunk(*key)
+            lr, lc = r & CHUNK_MASK, c & CHUNK_MASK
+            i = (lr << CHUNK_BITS) | lc
+            state = cells[i]
+            if state & FLAGGED:
+                continue # Flags block the fill
+            if not state & REVEALED:
+                cells[i] = state | REVEALED
+                revealed.append((r, c))
+            elif not first:
+                continue # Already handled, cells can be queued more than once
+            first = False
+            if state & MINE or state >> COUNT_SHIFT:
+                continue # Numbers and mines never spread
+            if 0 < lr < CHUNK_MASK and 0 < lc < CHUNK_MASK and r + 1 < size and c + 1 < size:
+                # All neighbours are in this chunk, so step through its bytes directly
+                for dr, dc, step in NEIGHBOUR_STEPS:
+                    if not cells[i + step] & (REVEALED | FLAGGED):
+                        stack.append((r + dr, c + dc))
+            else:
+                for nr in range(max(r - 1, 0), min(r + 2, size)):
+                    for nc in range(max(c - 1, 0), min(c + 2, size)):
+                        if not self.peek(nr, nc) & (REVEALED | FLAGGED):
+                            stack.append((nr, nc))
+        # Only the clicked cell can be a mine, a cascade never reaches one
+        hit_mine = bool(revealed) and bool(self.peek(*revealed[0]) & MINE)
+        self.revealed_safe += len(revealed) - hit_mine
+        return revealed
+
+    def dig(self, r, c):
+        """
+        Handles a 'dig' action on a cell. Digging a revealed '0' cell
+        continues a cascade that was cut off at MAX_REVEAL.
+        Returns a MoveResult with the event and the newly revealed cells.
+        """
+        state = self.peek(r, c)
+        if self.game_over or state & FLAGGED:
+            return MoveResult(NOTHING, [])
+        if state & REVEALED and self.neighbour_count(r, c) != 0:
+            return MoveResult(NOTHING, []) # Only an empty cell can still spread
+        cells = self.reveal_cell(r, c)
+        if not cells:
+            return MoveResult(NOTHING, [])
+        if self.peek(r, c) & MINE:
+            self.game_over = True # Game ends if a mine is dug
+            return self.record_move(MoveResult(BOOM, cells))
+        return self.record_move(MoveResult(DIG, cells))
+
+    def reveal_all_bombs(self):
+        """
+        Reveals the mines of every chunk generated so far, called when the
+        game is lost. Returns the list of mines that were hidden until now.
+        """
+        shown = []
+        for (cr, cc), cells in self.chunks.items():
+            for i, state in enumerate(cells):
+                if state & MINE and not state & REVEALED:
+                    cells[i] = state | REVEALED
+                    shown.append(((cr << CHUNK_BITS) | (i >> CHUNK_BITS), (cc << CHUNK_BITS) | (i & CHUNK_MASK)))
+        return shown
+
+    def toggle_flag(self, r, c):
+        """
+        Toggles the flag on an unrevealed cell.
+        Returns a MoveResult with the event and the cell whose flag changed.
+        """
+        cells = self.chunk(r >> CHUNK_BITS, c >> CHUNK_BITS)
+        i = ((r & CHUNK_MASK) << CHUNK_BITS) | (c & CHUNK_MASK)
+        if self.game_over or cells[i] & REVEALED:
+            return MoveResult(NOTHING, [])
+        cells[i] ^= FLAGGED
+        flagged = bool(cells[i] & FLAGGED)
+        self.flag_count += 1 if flagged else -1
+        return self.record_move(MoveResult(FLAG if flagged else UNFLAG, [(r, c)]))
+
+    def record_move(self, result):
+        """
+        Remembers the latest move, like Grid_snifferGame.record_move.
+        """
+        self.move_count += 1
+        self.last_result = result
+        return result
+
+    def flags_placed(self):
+        """
+        Returns how many flags are currently on the board.
+        """
+        return self.flag_count
+
+    def memory_bytes(self):
+        """
+        Returns the bytes used by chunk state, which grows with the explored area.
+        """
+        return len(self.chunks) * CHUNK * CHUNK
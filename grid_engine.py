@@ -0,0 +1,473 @@
+# Headless game engine for Grid Sniffer.
+# Holds the board model and a small batch simulator; it does not import pygame,
+# so solvers, benchmarks and tests can use it without opening a window.
+import random
+import time
+from collections import namedtuple
+
+try:
+    import numpy as np # Optional, makes board generation much faster on big boards
+except ImportError:
+    np = None # Fall back to the pure Python board generator
+
+# CONSTANTS
+MINES = -1
+
+# Define difficulty levels: (board_size, number_of_bombs)
+DIFFICULTIES = {
+    "Easy": (9, 10),
+    "Medium": (12, 20),
+    "Hard": (16, 40)
+}
+
+# Events returned by Grid_snifferGame.dig and Grid_snifferGame.toggle_flag
+NOTHING = "nothing" # The move did not change anything
+DIG = "dig" # Safe cells were revealed
+BOOM = "boom" # A mine was dug, the game is lost
+WIN = "win" # The last safe cell was revealed, the game is won
+FLAG = "flag" # A flag was placed
+UNFLAG = "unflag" # A flag was removed
+
+def row_views(data, size):
+    """
+    Returns one memoryview per row of a flat row-major buffer, so a cell can
+    still be read and written as grid[r][c] while the data stays in one
+    block that is cheap to allocate.
+    """
+    view = memoryview(data)
+    return [view[r * size:(r + 1) * size] for r in range(size)]
+
+# Result of a single move: the event and the list of (row, col) cells it changed
+MoveResult = namedtuple("MoveResult", ["event", "cells"])
+
+# Game class to manage all logic and state
+class Grid_snifferGame:
+    def __init__(self, size, bombs, seed=None, safe_first_click=False, board_source=None):
+        self.size = size # Size of the square grid (e.g., 9 for 9x9)
+        self.bombs = bombs # Number of mines to place
+        self.seed = seed # Seed for mine placement, the same seed gives the same board
+        # With a safe first click the mines are only placed when the first cell is dug,
+        # keeping that cell and its neighbours free so the first click opens a region.
+        # board_source(size, bombs, start, seed) can supply that board instead, e.g. a no-guess one.
+        self.safe_first_click = safe_first_click or board_source is not None
+        self.board_source = board_source
+        # Flat mask of '0' cells that are not dug or flagged yet, used by the flood fill
+        self.empty_cells = None # Filled in by create_board
+        self.board = None # The hidden game board with mines and numbers
+        if not self.safe_first_click:
+            self.board = self.create_board()
+        # Which cells are revealed and flagged, as one flat mask each with per-row views
+        self.visible = row_views(bytearray(size * size), size)
+        self.flagged = row_views(bytearray(size * size), size)
+        self.dug = bytearray(size * size) # Flat mask of revealed cells, index is r * size + c
+        self.safe_cells = size * size - bombs # Number of non-mine cells to reveal for a win
+        self.revealed_safe = 0 # Number of non-mine cells revealed so far
+        self.flag_count = 0 # Number of flags currently placed
+        self.game_over = False # True if the game has ended (win or lose)
+        self.start_time = time.time() # Time when the game started
+        self.victory = False # True if the player won
+        self.move_count = 0 # Number of moves that changed the board
+        self.last_result = None # MoveResult of the latest move that changed the board
+
+    def create_board(self, safe_zone=()):
+        """
+        Initializes the game board, places mines randomly without replacement,
+        and calculates neighboring bomb counts for non-mine cells.
+        safe_zone lists flat cell indexes (r * size + c) that must stay mine-free.
+        Uses NumPy when it is installed and a pure Python version otherwise;
+        each backend is reproducible for a given seed.
+        """
+        if not 0 <= self.bombs <= self.size * self.size - len(safe_zone):
+            raise ValueError(f"cannot place {self.bombs} bombs on a {self.size}x{self.size} board")
+        if np is not None:
+            return self.create_board_numpy(safe_zone)
+        return self.create_board_python(safe_zone)
+
+    def safe_zone(self, r, c):
+        """
+        Returns the cells kept mine-free around a first click at (r, c): the
+        cell and its neighbours, or just the cell when the board is too full.
+        """
+        size = self.size
+        zone = [
+            nr * size + nc
+            for nr in range(max(r - 1, 0), min(r + 2, size))
+            for nc in range(max(c - 1, 0), min(c + 2, size))
+        ]
+        if self.bombs <= size * size - len(zone):
+            return zone
+        if self.bombs < size * size:
+            return [r * size + c]
+        return []
+
+    def adopt_board(self, board, empty_cells=None):
+        """
+        Uses a ready-made board (e.g. from a no-guess generator) instead of
+        generating one. Flags placed before the board existed are respected.
+        """
+        size = self.size
+        self.board = board
+        if empty_cells is None:
+            empty_cells = bytearray(value == 0 for row in board for value in row)
+        self.empty_cells = empty_cells
+        if self.flag_count:
+            for r in range(size):
+                for c in range(size):
+                    if self.flagged[r][c]:
+                        self.empty_cells[r * size + c] = 0 # A flagged '0' cell stops the flood fill
+
+    def create_board_numpy(self, safe_zone=()):
+        """
+        Vectorized board generation: samples mine positions in one call and
+        sums the shifted neighbour slices of a padded mine grid.
+        """
+        size = self.size
+        rng = np.random.default_rng(self.seed)
+        mines = np.zeros(size * size, dtype=bool)
+        allowed = np.delete(np.arange(size * size), sorted(safe_zone)) if safe_zone else size * size
+        mines[rng.choice(allowed, self.bombs, replace=False)] = True
+        mines = mines.reshape(size, size)
+
+        # Pad with a ring of empty cells so the shifted slices never go out of bounds,
+        # then sum the 3x3 window as a row pass followed by a column pass
+        padded = np.pad(mines, 1).astype(np.int8)
+        rows = padded[:, :-2] + padded[:, 1:-1] + padded[:, 2:]
+        counts = rows[:-2] + rows[1:-1] + rows[2:] - mines # Don't count the cell itself
+        counts = np.where(mines, np.int8(MINES), counts)
+
+        self.empty_cells = bytearray((counts == 0).tobytes())
+        # Signed bytes with row views instead of nested lists, which take far longer to build
+        return row_views(memoryview(bytearray(counts.astype(np.int8).tobytes())).cast("b"), size)
+
+    def create_board_python(self, safe_zone=()):
+        """
+        Pure Python board generation: samples mine positions without
+        replacement and adds one to the neighbours of every mine.
+        """
+        size = self.size
+        board = [[0] * size for _ in range(size)] # Initialize all cells to 0
+        allowed = range(size * size)
+        if safe_zone:
+            zone = set(safe_zone)
+            allowed = [i for i in allowed if i not in zone]
+        positions = random.Random(self.seed).sample(allowed, self.bombs)
+
+        # Place bombs first so the counting pass can skip them
+        for i in positions:
+            r, c = divmod(i, size)
+            board[r][c] = MINES
+
+        # Each mine adds one to every non-mine neighbour
+        for i in positions:
+            r, c = divmod(i, size)
+            for nr in range(max(r - 1, 0), min(r + 2, size)):
+                row = board[nr]
+                for nc in range(max(c - 1, 0), min(c + 2, size)):
+                    if row[nc] != MINES:
+                        row[nc] += 1
+
+        self.empty_cells = bytearray(value == 0 for row in board for value in row)
+        return board
+
+    def count_neighbouring_bombs(self, r, c, board):
+        """
+        Counts the number of mines in the 8 surrounding cells of a given cell (r, c).
+        """
+        count = 0
+        size = self.size
+        # Iterate through all 8 neighboring cells (including the cell itself, which is skipped)
+        for i in [r - 1, r, r + 1]:
+            for j in [c - 1, c, c + 1]:
+                if i == r and j == c:
+                    continue # Skip the its own cell
+                # Check if the neighbor is within the board boundaries
+                if 0 <= i < size and 0 <= j < size:
+                    if board[i][j] == MINES:
+                        count += 1
+        return count
+
+    def reveal_cell(self, r, c):
+        """
+        Reveals a cell and, if it's a '0' (no adjacent mines), flood fills the
+        empty region around it with an iterative scanline fill.
+        Returns the list of newly revealed (row, col) cells.
+        """
+        size = self.size
+        dug = self.dug
+        visible = self.visible
+        flagged = self.flagged
+        # Do not reveal if already revealed or flagged
+        if dug[r * size + c] or flagged[r][c]:
+            return []
+
+        if self.board[r][c] != 0:
+            # Numbers and mines never spread, so only this cell is revealed
+            dug[r * size + c] = 1
+            visible[r][c] = True
+            if self.board[r][c] != MINES:
+                self.revealed_safe += 1
+            return [(r, c)]
+
+        empty = self.empty_cells
+        revealed = []
+        stack = [(r, c)] # Seeds of empty spans still to fill
+        while stack:
+            r, c = stack.pop()
+            row_start = r * size
+            if not empty[row_start + c]:
+                continue # Span was already filled from another seed
+
+            # Grow the span of empty cells to the left and right of the seed
+            left = max(empty.rfind(0, row_start, row_start + c) + 1, row_start)
+            right = empty.find(0, row_start + c, row_start + size)
+            if right == -1:
+                right = row_start + size
+            empty[left:right] = bytes(right - left) # The span is dug now
+
+            # Reveal the span and every cell touching it (the numbered border)
+            lo = max(left - row_start - 1, 0)
+            hi = min(right - row_start + 1, size)
+            for nr in (r - 1, r, r + 1):
+                if not 0 <= nr < size:
+                    continue # Row is outside the board
+                base = nr * size
+                visible_row = visible[nr]
+                flagged_row = flagged[nr]
+                # Walk the runs of undug cells so whole runs are revealed with slices
+                i = dug.find(0, base + lo, base + hi)
+                while i != -1:
+                    j = dug.find(1, i, base + hi)
+                    if j == -1:
+                        j = base + hi
+                    a, b = i - base, j - base
+                    if True in flagged_row[a:b]:
+                        # Flags are rare, so fall back to a per-cell check here
+                        for nc in range(a, b):
+                            if not flagged_row[nc]:
+                                dug[base + nc] = 1
+                                visible_row[nc] = True
+                                revealed.append((nr, nc))
+                    else:
+                        dug[i:j] = b"\x01" * (j - i)
+                        visible_row[a:b] = b"\x01" * (b - a)
+                        revealed.extend(zip([nr] * (b - a), range(a, b)))
+                    i = dug.find(0, j, base + hi)
+                if nr == r:
+                    continue
+                # Queue one seed for each run of empty cells touching the span
+                i = empty.find(1, base + lo, base + hi)
+                while i != -1:
+                    stack.append((nr, i - base))
+                    run_end = empty.find(0, i, base + hi)
+                    if run_end == -1:
+                        break
+                    i = empty.find(1, run_end, base + hi)
+        self.revealed_safe += len(revealed) # A flood fill never reaches a mine
+        return revealed
+
+    def dig(self, r, c):
+        """
+        Handles a 'dig' action (left-click) on a cell.
+        Checks for mines and updates game state.
+        Returns a MoveResult with the event (NOTHING, DIG, BOOM or WIN)
+        and the list of newly revealed (row, col) cells.
+        """
+        if self.game_over or self.visible[r][c] or self.flagged[r][c]:
+            return MoveResult(NOTHING, []) # Do nothing if cell is already visible or flagged
+
+        if self.board is None:
+            # First click of a safe-first-click game: place the mines around it now
+            if self.board_source is not None:
+                self.adopt_board(self.board_source(self.size, self.bombs, (r, c), self.seed))
+            else:
+                board = self.create_board(self.safe_zone(r, c))
+                self.adopt_board(board, self.empty_cells)
+        cells = self.reveal_cell(r, c) # Always reveal the cell after digging
+        if self.board[r][c] == MINES:
+            self.game_over = True # Game ends if a mine is dug
+            self.victory = False # Player loses
+            return self.record_move(MoveResult(BOOM, cells))
+        if self.is_victory():
+            self.game_over = True # Every safe cell is open
+            self.victory = True # Player won
+            return self.record_move(MoveResult(WIN, cells))
+        return self.record_move(MoveResult(DIG, cells))
+
+    def record_move(self, result):
+        """
+        Remembers the latest move so observers such as the solver can catch up
+        with one cheap update instead of re-reading the whole board.
+        """
+        self.move_count += 1
+        self.last_result = result
+        return result
+
+    def is_victory(self):
+        """
+        Checks if the player has won the game.
+        Victory condition: all non-mine cells are visible.
+        """
+        return self.revealed_safe == self.safe_cells
+
+    def safe_cells_remaining(self):
+        """
+        Returns how many non-mine cells are still hidden.
+        """
+        return self.safe_cells - self.revealed_safe
+
+    def flags_placed(self):
+        """
+        Returns how many flags are currently on the board.
+        """
+        return self.flag_count
+
+    def reveal_all_bombs(self):
+        """
+        Reveals all bomb locations on the board, called when the game is lost.
+        Returns the list of mines that were hidden until now.
+        """
+        shown = []
+        if self.board is None:
+            return shown # No mines were placed yet
+        for r in range(self.size):
+            for c in range(self.size):
+                if self.board[r][c] == MINES and not self.visible[r][c]:
+                    self.visible[r][c] = True
+                    shown.append((r, c))
+        return shown
+
+    def toggle_flag(self, r, c):
+        """
+        Toggles the flag on (right-click).
+        Flags can only be placed on unrevealed cells.
+        Returns a MoveResult with the event (NOTHING, FLAG or UNFLAG)
+        and the list of cells whose flag changed.
+        """
+        if self.game_over or self.visible[r][c]:
+            return MoveResult(NOTHING, []) # Only allow flagging on unrevealed cells
+        self.flagged[r][c] = not self.flagged[r][c] # Toggle flag state
+        self.flag_count += 1 if self.flagged[r][c] else -1
+        if self.board is not None and self.board[r][c] == 0:
+            # A flagged '0' cell stops the flood fill until it is unflagged
+            self.empty_cells[r * self.size + c] = not self.flagged[r][c]
+        return self.record_move(MoveResult(FLAG if self.flagged[r][c] else UNFLAG, [(r, c)]))
+
+# Strategies for the batch simulator.
+# A strategy is called as strategy(game, rng) and returns an action tuple
+# ("dig", r, c) or ("flag", r, c), where rng is a random.Random for that game.
+
+def random_hidden_cell(game, rng):
+    """
+    Returns a random cell that is neither revealed nor flagged,
+    or None if there is no such cell.
+    """
+    size = game.size
+    dug = game.dug
+    total = size * size
+    start = rng.randrange(total)
+    i = dug.find(0, start)
+    checked = 0
+    while checked < total:
+        if i == -1:
+            i = dug.find(0) # Wrap around to the start of the board
+            if i == -1:
+                return None
+        r, c = divmod(i, size)
+        if not game.flagged[r][c]:
+            return r, c
+        checked += 1
+        i = dug.find(0, i + 1)
+    return None
+
+def random_strategy(game, rng):
+    """
+    Digs a random hidden cell, the baseline every other strategy should beat.
+    """
+    r, c = random_hidden_cell(game, rng)
+    return ("dig", r, c)
+
+def basic_strategy(game, rng):
+    """
+    Applies the two single-cell rules to every revealed number:
+    if a number already touches as many flags as it shows, its other hidden
+    neighbours are safe; if it touches exactly as many hidden cells as it
+    shows, they are all mines. Falls back to a random dig when stuck.
+    """
+    size = game.size
+    board, visible, flagged = game.board, game.visible, game.flagged
+    for r in range(size):
+        for c in range(size):
+            value = board[r][c]
+            if not visible[r][c] or value <= 0:
+                continue # Only revealed numbers give information
+            hidden = []
+            flags = 0
+            for nr in range(max(r - 1, 0), min(r + 2, size)):
+                for nc in range(max(c - 1, 0), min(c + 2, size)):
+                    if flagged[nr][nc]:
+                        flags += 1
+                    elif not visible[nr][nc]:
+                        hidden.append((nr, nc))
+            if not hidden:
+                continue
+            if flags == value:
+                return ("dig",) + hidden[0]
+            if flags + len(hidden) == value:
+                return ("flag",) + hidden[0]
+    return random_strategy(game, rng)
+
+# Strategies by name, for command-line tools
+STRATEGIES = {
+    "random": random_strategy,
+    "basic": basic_strategy,
+}
+
+def play_game(size, bombs, strategy=random_strategy, seed=None):
+    """
+    Plays one game to the end with the given strategy.
+    Returns the finished game and the number of moves made.
+    """
+    game = Grid_snifferGame(size, bombs, seed)
+    rng = random.Random(seed)
+    moves = 0
+    while not game.game_over:
+        action, r, c = strategy(game, rng)
+        if action == "flag":
+            game.toggle_flag(r, c)
+        else:
+            game.dig(r, c)
+        moves += 1
+    return game, moves
+
+def game_seed(seed, index):
+    """
+    Returns the seed of game number index in a batch started with seed,
+    so any single game of a batch can be replayed on its own.
+    """
+    return (seed << 32) + index
+
+def run_batch(games, size, bombs, strategy=random_strategy, seed=0):
+    """
+    Plays a batch of games and returns a dict with the win rate and throughput.
+    """
+    wins = 0
+    total_moves = 0
+    start = time.perf_counter()
+    for index in range(games):
+        game, moves = play_game(size, bombs, strategy, game_seed(seed, index))
+        wins += game.victory
+        total_moves += moves
+    seconds = time.perf_counter() - start
+    return {
+        "games": games,
+        "wins": wins,
+        "win_rate": wins / games if games else 0.0,
+        "moves": total_moves,
+        "seconds": seconds,
+        "games_per_sec": games / seconds if seconds else 0.0,
+        "moves_per_sec": total_moves / seconds if seconds else 0.0,
+    }
+
+if __name__ == "__main__":
+    for name, strategy in (("random", random_strategy), ("basic", basic_strategy)):
+        print(name, run_batch(1000, 9, 10, strategy))
@@ -0,0 +1,147 @@
+# Load test for grid_server.py.
+# Opens many sessions on one server, each with a few players digging random
+# hidden cells and some spectators watching, and reports actions/sec, the
+# latency from sending an action to receiving the frame with its result, and
+# how many bytes the deltas took.
+#
+#   python grid_server.py &
+#   python grid_loadtest.py --sessions 200 --players 2 --spectators 1 --seconds 10
+#   python grid_loadtest.py --local   # run the server in this process instead
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from grid_engine import DIFFICULTIES
+from grid_profiler import percentile
+from grid_server import HOST, PORT, PLAYER, SPECTATOR, HIDDEN_CELL, GameClient, GameServer
+
+async def play(host, port, session, size, bombs, seed, seconds, rng, latencies):
+    """
+    Plays on one session until the time is up, one action at a time: dig a
+    random hidden cell, wait for the frame answering it, and start a new
+    board once the game is over. Returns the number of actions made.
+    """
+    client = GameClient()
+    await client.connect(host, port)
+    await client.join(session, PLAYER, size, bombs, seed)
+    player = client.welcome.player
+    board = client.board
+    clock = time.perf_counter
+    end = clock() + seconds
+    request = 0
+    try:
+        while clock() < end:
+            request += 1
+            if board.game_over:
+                client.send("restart", request=request)
+            else:
+                # The first hidden cell from a random starting point
+                i = board.cells.find(HIDDEN_CELL, rng.randrange(len(board.cells)))
+                if i == -1:
+                    i = board.cells.find(HIDDEN_CELL)
+                client.send("dig", i // size, i % size, request)
+            sent = clock()
+            answered = False
+            while not answered:
+                for move in await client.read_moves():
+                    answered = answered or (move.player == player and move.request == request)
+            latencies.append(clock() - sent)
+    finally:
+        await client.close()
+    return request
+
+async def watch(host, port, session, size, bombs, seed, seconds):
+    """
+    Watches one session until the time is up and returns the number of frames received.
+    """
+    client = GameClient()
+    await client.connect(host, port)
+    await client.join(session, SPECTATOR, size, bombs, seed)
+    frames = 0
+    loop = asyncio.get_running_loop()
+    end = loop.time() + seconds
+    try:
+        while True:
+            await asyncio.wait_for(client.read_moves(), max(end - loop.time(), 0))
+            frames += 1
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        await client.close()
+    return frames, client.bytes_received
+
+async def run_load(host=HOST, port=PORT, sessions=100, players=2, spectators=1, size=16, bombs=40,
+                   seconds=10.0, seed=0, local=False, tick_ms=None):
+    """
+    Runs the load test and returns a dict of summary statistics.
+    With local=True a GameServer is started in this process on a free port.
+    """
+    server = None
+    if local:
+        server = GameServer() if tick_ms is None else GameServer(tick_ms)
+        port = await server.start(host, 0)
+    latencies = [] # Seconds from sending an action to receiving its frame
+    tasks = []
+    for session in range(sessions):
+        # Players join first so the watchers see their moves from the start
+        for p in range(players):
+            rng = random.Random(seed * 1000003 + session * 101 + p)
+            tasks.append(play(host, port, session, size, bombs, seed + session, seconds, rng, latencies))
+        for _ in range(spectators):
+            tasks.append(watch(host, port, session, size, bombs, seed + session, seconds))
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        if server is not None:
+            await server.close()
+    elapsed = time.perf_counter() - start
+
+    actions = sum(result for result in results if isinstance(result, int))
+    watched = [result for result in results if isinstance(result, tuple)]
+    latencies.sort()
+    return {
+        "sessions": sessions,
+        "clients": len(tasks),
+        "seconds": elapsed,
+        "actions": actions,
+        "actions_per_sec": actions / elapsed,
+        "latency_p50_ms": percentile(latencies, 0.50) * 1000,
+        "latency_p95_ms": percentile(latencies, 0.95) * 1000,
+        "latency_p99_ms": percentile(latencies, 0.99) * 1000,
+        "spectator_frames": sum(frames for frames, _ in watched),
+        "spectator_bytes_per_action": sum(received for _, received in watched) / actions if actions else 0.0,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test a Grid Sniffer server.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--local", action="store_true", help="start the server in this process")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--players", type=int, default=2, help="players per session")
+    parser.add_argument("--spectators", type=int, default=1, help="spectators per session")
+    parser.add_argument("--preset", choices=DIFFICULTIES, default="Hard", help="board of every session")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    size, bombs = DIFFICULTIES[args.preset]
+    try:
+        stats = asyncio.run(run_load(args.host, args.port, args.sessions, args.players, args.spectators,
+                                     size, bombs, args.seconds, args.seed, args.local))
+    except (OSError, asyncio.IncompleteReadError) as error:
+        parser.exit(1, f"Lost the server at {args.host}:{args.port}: {error}\n") # Not running, or it went away
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return
+    print(f"{stats['sessions']} sessions, {stats['clients']} clients, {stats['seconds']:.1f}s")
+    print(f"  actions:      {stats['actions']} ({stats['actions_per_sec']:.0f}/sec)")
+    print(f"  latency:      p50 {stats['latency_p50_ms']:.1f} ms, p95 {stats['latency_p95_ms']:.1f} ms, p99 {stats['latency_p99_ms']:.1f} ms")
+    print(f"  spectators:   {stats['spectator_frames']} frames, {stats['spectator_bytes_per_action']:.1f} bytes per action")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# Frame and hot-path profiler for Grid Sniffer.
+# Times the phases of each frame of the game loop and wraps the slow model
+# operations (create_board, reveal_cell, dig, ...) with timers. Nothing is
+# wrapped until instrument() is called and uninstrument() puts the original
+# functions back, so a disabled profiler costs nothing.
+import csv
+import functools
+import json
+import time
+from collections import deque
+
+from grid_engine import MoveResult
+
+MAX_SAMPLES = 10000 # Most recent timings kept per phase or operation, for percentiles
+
+def percentile(sorted_values, fraction):
+    """
+    Returns the value at the given fraction (0..1) of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+class Stat:
+    """
+    Call count, total time and recent samples of one phase or operation.
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0 # Seconds
+        self.samples = deque(maxlen=MAX_SAMPLES) # Seconds of the latest calls
+        self.cells = 0 # Cells changed, for operations that return a MoveResult
+
+    def add(self, seconds, cells=0):
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+        self.cells += cells
+
+    def summary(self):
+        samples = sorted(self.samples)
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "avg_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": percentile(samples, 0.50) * 1000,
+            "p95_ms": percentile(samples, 0.95) * 1000,
+            "p99_ms": percentile(samples, 0.99) * 1000,
+            "cells_per_call": self.cells / self.count if self.count else 0.0,
+        }
+
+class Profiler:
+    """
+    Collects frame times, per-phase times within a frame and per-call times
+    of instrumented functions.
+    A frame is timed from one start_frame() to the next, and lap(phase)
+    charges the time since the previous lap to that phase.
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.phases = {} # Phase name -> Stat
+        self.ops = {} # Operation name -> Stat
+        self.frames = deque(maxlen=MAX_SAMPLES) # Seconds of the latest whole frames
+        self.frame_start = None
+        self.last_lap = None
+        self.patched = [] # (owner, attribute, original) for uninstrument
+
+    def start_frame(self):
+        now = self.clock()
+        if self.frame_start is not None:
+            self.frames.append(now - self.frame_start)
+        self.frame_start = self.last_lap = now
+
+    def lap(self, phase):
+        now = self.clock()
+        stat = self.phases.get(phase)
+        if stat is None:
+            stat = self.phases[phase] = Stat()
+        stat.add(now - self.last_lap)
+        self.last_lap = now
+
+    def timed(self, name, func):
+        """
+        Returns func wrapped so every call is timed under the given name.
+        For calls returning a MoveResult the changed cells are counted too.
+        """
+        stat = self.ops.setdefault(name, Stat())
+        clock = self.clock
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            result = func(*args, **kwargs)
+            stat.add(clock() - start, len(result.cells) if isinstance(result, MoveResult) else 0)
+            return result
+        return wrapper
+
+    def instrument(self, owner, names, prefix=None):
+        """
+        Replaces the named functions of a class or module with timed versions.
+        Operations are named "<prefix>.<name>", the prefix defaults to the owner's name.
+        """
+        prefix = prefix or owner.__name__
+        for name in names:
+            original = owner.__dict__[name]
+            setattr(owner, name, self.timed(f"{prefix}.{name}", original))
+            self.patched.append((owner, name, original))
+
+    def uninstrument(self):
+        """
+        Puts back every function replaced by instrument.
+        """
+        for owner, name, original in reversed(self.patched):
+            setattr(owner, name, original)
+        self.patched = []
+
+    def summary(self):
+        """
+        Returns all metrics as a dict: FPS, frame time percentiles, phases and operations.
+        """
+        frames = sorted(self.frames)
+        frame_total = sum(frames)
+        return {
+            "frames": len(frames),
+            "fps": len(frames) / frame_total if frame_total else 0.0,
+            "frame_p50_ms": percentile(frames, 0.50) * 1000,
+            "frame_p95_ms": percentile(frames, 0.95) * 1000,
+            "frame_p99_ms": percentile(frames, 0.99) * 1000,
+            "phases": {name: stat.summary() for name, stat in self.phases.items()},
+            "ops": {name: stat.summary() for name, stat in self.ops.items()},
+        }
+
+    def write_metrics(self, path):
+        """
+        Writes the summary to path, as CSV when it ends in .csv and JSON otherwise.
+        """
+        summary = self.summary()
+        if not path.endswith(".csv"):
+            with open(path, "w") as f:
+                json.dump(summary, f, indent=2)
+            return
+        fields = ["count", "total_s", "avg_ms", "p50_ms", "p95_ms", "p99_ms", "cells_per_call"]
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["kind", "name"] + fields)
+            writer.writerow(["frame", "all", summary["frames"], "", "", summary["frame_p50_ms"], summary["frame_p95_ms"], summary["frame_p99_ms"], ""])
+            for kind in ("phases", "ops"):
+                for name, stats in summary[kind].items():
+                    writer.writerow([kind[:-1], name] + [stats[field] for field in fields])
+
+    def overlay_lines(self):
+        """
+        Returns short text lines for an on-screen overlay.
+        """
+        summary = self.summary()
+        lines = [
+            f"{summary['fps']:.0f} fps  frame p50 {summary['frame_p50_ms']:.1f}  p95 {summary['frame_p95_ms']:.1f}  p99 {summary['frame_p99_ms']:.1f} ms"
+        ]
+        for name, stats in summary["phases"].items():
+            lines.append(f"{name:<10} {stats['avg_ms']:6.2f} ms  p95 {stats['p95_ms']:6.2f}")
+        for name, stats in summary["ops"].items():
+            if not stats["count"]:
+                continue # Not called yet
+            line = f"{name} x{stats['count']}  {stats['avg_ms']:.2f} ms  p95 {stats['p95_ms']:.2f}"
+            if stats["cells_per_call"]:
+                line += f"  {stats['cells_per_call']:.1f} cells"
+            lines.append(line)
+        return lines
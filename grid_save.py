@@ -0,0 +1,347 @@
+# Compact binary save and replay format for Grid Sniffer.
+# A file holds the mines of one game, the cell state when recording started and
+# an append-only log of the moves made after that. Every SNAPSHOT_INTERVAL
+# moves the full cell state is appended too, so any move can be rebuilt from
+# the nearest snapshot instead of replaying the game from the start.
+#
+# Layout (all numbers little-endian):
+#   header     HEADER, see below
+#   mines      size * size bits, row-major, bit i % 8 of byte i // 8
+#   state      size * size bytes, REVEALED / FLAGGED bits of each cell
+#   log        blocks of SNAPSHOT_INTERVAL MOVE records followed by one
+#              size * size byte state snapshot; the last block may be partial
+#
+# Because every record has a fixed size, the offset of any move or snapshot
+# is plain arithmetic. The move count follows from the file length, so a
+# recording cut short by a crash still loads up to its last whole move.
+import mmap
+import struct
+import sys
+import time
+from collections import namedtuple
+
+try:
+    import numpy as np # Optional, makes packing and unpacking big boards much faster
+except ImportError:
+    np = None # Fall back to pure Python loops
+
+from grid_engine import MINES, Grid_snifferGame, row_views
+from grid_chunks import REVEALED, FLAGGED # Same state bits as the chunked board
+
+MAGIC = b"GSNF"
+VERSION = 1
+SNAPSHOT_INTERVAL = 64 # Moves between two state snapshots in the log
+
+# magic, version, flags, board size, bombs, seed, start time, snapshot interval
+HEADER = struct.Struct("<4sHHIIQdI")
+HAS_SEED = 1 # Header flag: the seed field holds the game's seed
+# tick (milliseconds since the game started), action code, row, col
+MOVE = struct.Struct("<IBII")
+
+ACTIONS = ("dig", "flag") # Action names by their code in the log
+ACTION_CODES = {name: code for code, name in enumerate(ACTIONS)}
+
+# One move of a recording
+Move = namedtuple("Move", ["tick", "action", "r", "c"])
+
+# bytes.translate tables between the engine's dug mask and state bytes
+DUG_TO_STATE = bytes([0, REVEALED]) + bytes(254)
+REVEALED_BIT = bytes(1 if value & REVEALED else 0 for value in range(256))
+FLAGGED_BIT = bytes(1 if value & FLAGGED else 0 for value in range(256))
+
+def pack_mines(board):
+    """
+    Packs the mine positions of a board into a bitfield, one bit per cell.
+    """
+    size = len(board)
+    if np is not None:
+        return np.packbits(np.array(board, dtype=np.int8) == MINES, bitorder="little").tobytes()
+    bits = bytearray((size * size + 7) // 8)
+    for r, row in enumerate(board):
+        for c, value in enumerate(row):
+            if value == MINES:
+                i = r * size + c
+                bits[i >> 3] |= 1 << (i & 7)
+    return bytes(bits)
+
+def unpack_mines(bits, size):
+    """
+    Returns a flat bytearray with 1 for every mine of a packed bitfield.
+    """
+    if np is not None:
+        mask = np.unpackbits(np.frombuffer(bits, dtype=np.uint8), count=size * size, bitorder="little")
+        return bytearray(mask.tobytes())
+    return bytearray((bits[i >> 3] >> (i & 7)) & 1 for i in range(size * size))
+
+def board_from_mines(mask, size):
+    """
+    Builds a game board (MINES or the neighbour count of every cell) from a
+    flat mine mask.
+    """
+    if np is not None:
+        mines = np.frombuffer(bytes(mask), dtype=np.uint8).reshape(size, size).astype(np.int8)
+        padded = np.pad(mines, 1)
+        rows = padded[:, :-2] + padded[:, 1:-1] + padded[:, 2:]
+        counts = rows[:-2] + rows[1:-1] + rows[2:] - mines # Don't count the cell itself
+        return np.where(mines == 1, np.int8(MINES), counts).tolist()
+    board = [[0] * size for _ in range(size)]
+    positions = [i for i, mine in enumerate(mask) if mine]
+    for i in positions:
+        r, c = divmod(i, size)
+        board[r][c] = MINES
+    # Each mine adds one to every non-mine neighbour
+    for i in positions:
+        r, c = divmod(i, size)
+        for nr in range(max(r - 1, 0), min(r + 2, size)):
+            row = board[nr]
+            for nc in range(max(c - 1, 0), min(c + 2, size)):
+                if row[nc] != MINES:
+                    row[nc] += 1
+    return board
+
+def game_state(game):
+    """
+    Returns the state bytes of a game: REVEALED and FLAGGED bits per cell.
+    """
+    size = game.size
+    state = game.dug.translate(DUG_TO_STATE)
+    if game.flag_count:
+        for r, row in enumerate(game.flagged):
+            if True in row:
+                for c, flagged in enumerate(row):
+                    if flagged:
+                        state[r * size + c] |= FLAGGED
+    return state
+
+def restore_game(size, bombs, seed, board, state):
+    """
+    Creates a Grid_snifferGame with the given board and cell state, ready to
+    continue from that point.
+    """
+    game = Grid_snifferGame(size, bombs, seed, safe_first_click=True) # No board is generated
+    dug = bytearray(bytes(state).translate(REVEALED_BIT))
+    flags = bytes(state).translate(FLAGGED_BIT)
+    game.dug = dug
+    game.visible = row_views(bytearray(dug), size)
+    game.flagged = row_views(bytearray(flags), size)
+    game.flag_count = flags.count(1)
+    game.adopt_board(board)
+    # Dug cells take no further part in the flood fill
+    game.empty_cells = bytearray(empty and not done for empty, done in zip(game.empty_cells, dug))
+
+    revealed_mines = sum(1 for r, row in enumerate(board) for c, value in enumerate(row) if value == MINES and dug[r * size + c])
+    game.revealed_safe = dug.count(1) - revealed_mines
+    game.victory = not revealed_mines and game.revealed_safe == game.safe_cells
+    game.game_over = bool(revealed_mines) or game.victory
+    return game
+
+class GameRecorder:
+    """
+    Writes a game to an open binary file while it is played.
+    Call record after every move that changed the board. The header is
+    written once the board exists, so flags placed before the first dig of
+    a safe-first-click game are kept until then.
+    """
+    def __init__(self, game, file, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.game = game
+        self.file = file # Binary file object, e.g. open(path, "wb") or io.BytesIO()
+        self.snapshot_interval = snapshot_interval
+        self.state = game_state(game) # State the log starts from
+        self.pending = [] # Moves made before the board existed
+        self.started = False # True once the header is written
+        self.moves = 0 # Moves written to the log
+
+    def write_header(self):
+        game = self.game
+        seed = game.seed
+        flags = 0
+        if isinstance(seed, int) and 0 <= seed < 1 << 64:
+            flags |= HAS_SEED
+        else:
+            seed = 0 # Seeds that don't fit 64 bits are not kept
+        self.file.write(HEADER.pack(MAGIC, VERSION, flags, game.size, game.bombs, seed, game.start_time, self.snapshot_interval))
+        self.file.write(pack_mines(game.board))
+        self.file.write(self.state)
+        self.started = True
+
+    def write_move(self, move, state):
+        self.file.write(MOVE.pack(move.tick, ACTION_CODES[move.action], move.r, move.c))
+        self.moves += 1
+        if self.moves % self.snapshot_interval == 0:
+            self.file.write(state)
+
+    def record(self, action, r, c, tick=None):
+        """
+        Appends one move ("dig" or "flag" at r, c) to the log. tick defaults
+        to the milliseconds since the game started.
+        """
+        if tick is None:
+            tick = int((time.time() - self.game.start_time) * 1000)
+        move = Move(tick, action, r, c)
+        if self.game.board is None:
+            self.pending.append(move)
+            return
+        if not self.started:
+            self.write_header()
+            # Only flags can come before the board exists, so their snapshots
+            # are the starting state with the flags toggled one by one
+            state = bytearray(self.state)
+            for early in self.pending:
+                state[early.r * self.game.size + early.c] ^= FLAGGED
+                self.write_move(early, state)
+            self.pending = []
+        self.write_move(move, game_state(self.game) if (self.moves + 1) % self.snapshot_interval == 0 else None)
+
+class SavedGame:
+    """
+    Read access to a recording through mmap. Opening a file only reads the
+    header; mines, moves and snapshots are read on demand, so scrubbing
+    through a long replay of a big board stays cheap.
+    """
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"{path} is empty, not a Grid Sniffer recording")
+        if len(self.data) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is too short to be a Grid Sniffer recording")
+        magic, version, flags, size, bombs, seed, start_time, interval = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a Grid Sniffer recording")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path} uses format version {version}, only version {VERSION} is supported")
+        self.size = size
+        self.bombs = bombs
+        self.seed = seed if flags & HAS_SEED else None
+        self.start_time = start_time
+        self.snapshot_interval = interval
+        cells = size * size
+        self.mines_offset = HEADER.size
+        self.state_offset = self.mines_offset + (cells + 7) // 8
+        self.log_offset = self.state_offset + cells
+        self.block_size = interval * MOVE.size + cells # Bytes of one full block of moves plus its snapshot
+        if len(self.data) < self.log_offset:
+            self.close()
+            raise ValueError(f"{path} is cut short before its moves, the mines or starting state are missing")
+
+        # Count the whole moves in the log; a torn record at the end is ignored.
+        # A block only has its snapshot once all of it is written, so after a
+        # torn snapshot its moves are replayed from the previous one instead
+        blocks, rest = divmod(len(self.data) - self.log_offset, self.block_size)
+        self.snapshot_count = blocks
+        self.move_count = blocks * interval + min(rest // MOVE.size, interval)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def is_mine(self, r, c):
+        """
+        Returns True if (r, c) holds a mine, reading a single byte of the file.
+        """
+        i = r * self.size + c
+        return bool((self.data[self.mines_offset + (i >> 3)] >> (i & 7)) & 1)
+
+    def mine_mask(self):
+        """
+        Returns a flat bytearray with 1 for every mine.
+        """
+        return unpack_mines(self.data[self.mines_offset:self.state_offset], self.size)
+
+    def board(self):
+        """
+        Returns the full game board with mines and neighbour counts.
+        """
+        return board_from_mines(self.mine_mask(), self.size)
+
+    def move_offset(self, index):
+        return self.log_offset + (index // self.snapshot_interval) * self.block_size + (index % self.snapshot_interval) * MOVE.size
+
+    def move(self, index):
+        """
+        Returns move number index (0-based) of the log.
+        """
+        if not 0 <= index < self.move_count:
+            raise IndexError(f"move {index} out of range, the recording has {self.move_count} moves")
+        tick, code, r, c = MOVE.unpack_from(self.data, self.move_offset(index))
+        return Move(tick, ACTIONS[code], r, c)
+
+    def moves(self, start=0, stop=None):
+        """
+        Yields the moves from number start up to, not including, stop.
+        """
+        stop = self.move_count if stop is None else min(stop, self.move_count)
+        for index in range(start, stop):
+            yield self.move(index)
+
+    def snapshot(self, moves):
+        """
+        Returns (n, state) for the latest stored state after n <= moves moves:
+        a snapshot from the log, or the starting state when n is 0.
+        """
+        cells = self.size * self.size
+        n = min(min(moves, self.move_count) // self.snapshot_interval, self.snapshot_count)
+        if n == 0:
+            return 0, self.data[self.state_offset:self.log_offset]
+        start = self.log_offset + n * self.block_size - cells
+        return n * self.snapshot_interval, self.data[start:start + cells]
+
+    def game_at(self, moves=None, board=None):
+        """
+        Returns the game as it was after the given number of moves (all of them
+        by default). It starts from the nearest snapshot and replays at most
+        snapshot_interval moves. Pass board, e.g. from board(), to skip
+        decoding the mines again while scrubbing.
+        """
+        if moves is None:
+            moves = self.move_count
+        moves = max(0, min(moves, self.move_count))
+        if board is None:
+            board = self.board()
+        done, state = self.snapshot(moves)
+        game = restore_game(self.size, self.bombs, self.seed, board, state)
+        game.start_time = self.start_time
+        for move in self.moves(done, moves):
+            if move.action == "flag":
+                game.toggle_flag(move.r, move.c)
+            else:
+                game.dig(move.r, move.c)
+        return game
+
+def render_text(game):
+    """
+    Returns the board as text: '#' hidden, 'F' flag, '*' mine, '.' or a number.
+    """
+    lines = []
+    for r in range(game.size):
+        line = []
+        for c in range(game.size):
+            if game.flagged[r][c]:
+                line.append("F")
+            elif not game.visible[r][c]:
+                line.append("#")
+            elif game.board[r][c] == MINES:
+                line.append("*")
+            else:
+                line.append(str(game.board[r][c]) if game.board[r][c] else ".")
+        lines.append("".join(line))
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    # python grid_save.py GAME.gsr [MOVES]: shows a recording after the given number of moves
+    with SavedGame(sys.argv[1]) as saved:
+        moves = int(sys.argv[2]) if len(sys.argv) > 2 else saved.move_count
+        game = saved.game_at(moves)
+        print(f"{saved.size}x{saved.size}, {saved.bombs} bombs, seed {saved.seed}, move {min(moves, saved.move_count)} of {saved.move_count}")
+        print(render_text(game))
@@ -0,0 +1,447 @@
+# Headless multiplayer server for Grid Sniffer.
+# Hosts many game sessions in one asyncio process. Players in the same session
+# share one board (co-op, or a race for the most cells since every move says
+# who made it) and spectators only watch. Moves are applied as they arrive,
+# and once per tick every session with new moves sends one binary frame to
+# its clients with just the cells those moves changed, never the whole board.
+#
+#   python grid_server.py --port 8765
+#   python grid_loadtest.py --sessions 200 --players 2 --spectators 1
+#
+# Every message is a HEADER (body length, message type) and a body, all
+# numbers little-endian:
+#   client -> server   JOIN_MSG   JOIN
+#                      ACTION_MSG ACTION
+#   server -> client   WELCOME_MSG WELCOME, then a TICK_MSG frame that brings
+#                                  the new client up to date
+#                      TICK_MSG   TICK, then TICK.count moves, each one MOVE
+#                                 followed by the changed cells: MOVE.count
+#                                 rows (uint16), as many cols (uint16) and
+#                                 one value byte per cell (see CELL_VALUES)
+#                      ERROR_MSG  a UTF-8 message, then the server hangs up
+import argparse
+import asyncio
+import struct
+import sys
+import time
+from array import array
+from collections import namedtuple
+
+from grid_engine import MINES, Grid_snifferGame, NOTHING, DIG, BOOM, WIN, FLAG, UNFLAG
+
+HOST = "127.0.0.1"
+PORT = 8765
+TICK_MS = 20 # Time between two frames of a session; moves in between are batched
+MAX_BUFFER = 1 << 20 # Bytes waiting to be sent to one client before it is dropped as too slow
+MAX_SIZE = 1000 # Largest board side a session may ask for
+
+# body length, message type
+HEADER = struct.Struct("<IB")
+JOIN_MSG, ACTION_MSG, WELCOME_MSG, TICK_MSG, ERROR_MSG = range(5)
+
+# session id, role, flags, board size, bombs, seed (the board settings only count when the session is new)
+JOIN = struct.Struct("<IBBHIQ")
+PLAYER, SPECTATOR = 0, 1 # Roles
+HAS_SEED = 1 # JOIN flag: the seed field holds the seed of the first board
+# action code, row, col, request id (echoed back in the MOVE, to match answers to actions)
+ACTION = struct.Struct("<BHHI")
+ACTIONS = ("dig", "flag", "restart") # Action names by their code; restart starts a new board once the game is over
+ACTION_CODES = {name: code for code, name in enumerate(ACTIONS)}
+
+# session id, player id (0 for spectators), role, board size, bombs
+WELCOME = struct.Struct("<IHBHI")
+# tick number, number of moves
+TICK = struct.Struct("<II")
+# player id, request id, action code, event code, number of changed cells
+MOVE = struct.Struct("<HIBBI")
+NEW = "new" # Event of a move that starts from an empty board: a restart, or the catch-up frame after joining
+EVENTS = (NOTHING, DIG, BOOM, WIN, FLAG, UNFLAG, NEW) # Event names by their code
+EVENT_CODES = {name: code for code, name in enumerate(EVENTS)}
+# Longest body a client accepts: a catch-up frame of the biggest board, 5 bytes per cell
+MAX_FRAME = TICK.size + MOVE.size + MAX_SIZE * MAX_SIZE * 5
+
+# Cell values on the wire: 0-8 are revealed numbers, then these
+MINE_CELL = 9
+FLAGGED_CELL = 10
+HIDDEN_CELL = 11 # A flag was removed
+CELL_VALUES = bytes(range(9)) + bytes([MINE_CELL, FLAGGED_CELL, HIDDEN_CELL])
+
+Welcome = namedtuple("Welcome", ["session", "player", "role", "size", "bombs"])
+# One decoded move; rows and cols are arrays of uint16, values a bytes object
+Move = namedtuple("Move", ["player", "request", "action", "event", "rows", "cols", "values"])
+
+def message(kind, body=b""):
+    return HEADER.pack(len(body), kind) + body
+
+def pack_cells(cells):
+    """
+    Packs (row, col) pairs as two uint16 arrays, rows first.
+    """
+    rows = array("H", [r for r, c in cells])
+    cols = array("H", [c for r, c in cells])
+    if sys.byteorder == "big":
+        rows.byteswap()
+        cols.byteswap()
+    return rows.tobytes() + cols.tobytes()
+
+def unpack_cells(data, count):
+    """
+    Returns the row and column arrays packed by pack_cells.
+    """
+    rows = array("H", data[:count * 2])
+    cols = array("H", data[count * 2:count * 4])
+    if sys.byteorder == "big":
+        rows.byteswap()
+        cols.byteswap()
+    return rows, cols
+
+def encode_move(player, request, action, event, cells, values):
+    return MOVE.pack(player, request, action, EVENT_CODES[event], len(cells)) + pack_cells(cells) + bytes(values)
+
+def decode_tick(body):
+    """
+    Returns the tick number and the list of Moves of a TICK_MSG body.
+    """
+    tick, count = TICK.unpack_from(body)
+    offset = TICK.size
+    moves = []
+    for _ in range(count):
+        player, request, action, event, cells = MOVE.unpack_from(body, offset)
+        offset += MOVE.size
+        rows, cols = unpack_cells(body[offset:offset + cells * 4], cells)
+        offset += cells * 4
+        values = body[offset:offset + cells]
+        offset += cells
+        moves.append(Move(player, request, ACTIONS[action], EVENTS[event], rows, cols, values))
+    return tick, moves
+
+async def read_message(reader, max_length):
+    """
+    Reads one message and returns (type, body). A body longer than
+    max_length raises ValueError before any of it is read, so a bad header
+    cannot make the reader wait for or buffer gigabytes.
+    """
+    length, kind = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length > max_length:
+        raise ValueError(f"message of {length} bytes, expected at most {max_length}")
+    return kind, await reader.readexactly(length)
+
+class Session:
+    """
+    One shared board with its players and spectators. Moves are applied to
+    the game right away and their encoded deltas wait in pending until the
+    server's next tick sends them to every client in one frame.
+    """
+    def __init__(self, session_id, size, bombs, seed=None):
+        self.id = session_id
+        self.size = size
+        self.bombs = bombs
+        self.seed = seed # Seed of the first board, later boards use seed + game number
+        self.games_played = 0
+        self.game = self.new_game()
+        self.clients = [] # StreamWriters of everyone in the session
+        self.next_player = 1
+        self.pending = [] # Encoded moves for the next frame
+
+    def new_game(self):
+        seed = None if self.seed is None else self.seed + self.games_played
+        self.games_played += 1
+        # The mines are placed around the first dig, like in the game itself
+        return Grid_snifferGame(self.size, self.bombs, seed, safe_first_click=True)
+
+    def cell_values(self, cells):
+        board = self.game.board
+        return [MINE_CELL if board[r][c] == MINES else board[r][c] for r, c in cells]
+
+    def apply(self, player, request, action, r, c):
+        """
+        Makes one move and queues its delta: the event and the changed cells.
+        """
+        game = self.game
+        cells = []
+        values = []
+        if ACTIONS[action] == "restart":
+            if game.game_over:
+                self.game = self.new_game()
+                event = NEW
+            else:
+                event = NOTHING # Someone else restarted already
+        elif not (0 <= r < self.size and 0 <= c < self.size):
+            event = NOTHING
+        elif ACTIONS[action] == "dig":
+            result = game.dig(r, c)
+            event, cells = result.event, result.cells
+            if event == BOOM:
+                cells = cells + game.reveal_all_bombs() # Everyone sees where the mines were
+            values = self.cell_values(cells)
+        else:
+            result = game.toggle_flag(r, c)
+            event, cells = result.event, result.cells
+            values = [FLAGGED_CELL if game.flagged[r][c] else HIDDEN_CELL for r, c in cells]
+        self.pending.append(encode_move(player, request, action, event, cells, values))
+
+    def catch_up(self):
+        """
+        Returns a frame with every revealed or flagged cell of the current
+        board, sent to a client that just joined.
+        """
+        game = self.game
+        cells = []
+        values = []
+        for r in range(self.size):
+            visible, flagged = game.visible[r], game.flagged[r]
+            for c in range(self.size):
+                if visible[c]:
+                    cells.append((r, c))
+                    values.append(MINE_CELL if game.board[r][c] == MINES else game.board[r][c])
+                elif flagged[c]:
+                    cells.append((r, c))
+                    values.append(FLAGGED_CELL)
+        move = encode_move(0, 0, ACTION_CODES["restart"], NEW, cells, values)
+        return message(TICK_MSG, TICK.pack(0, 1) + move)
+
+class GameServer:
+    """
+    Accepts clients, hosts their sessions and sends the batched deltas once per tick.
+    """
+    def __init__(self, tick_ms=TICK_MS, max_buffer=MAX_BUFFER):
+        self.tick_seconds = tick_ms / 1000
+        self.max_buffer = max_buffer
+        self.sessions = {} # Session id -> Session
+        self.dirty = set() # Sessions with moves waiting for the next tick
+        self.tick = 0
+        self.actions = 0 # Actions received, for the stats
+        self.frames = 0 # Frames sent
+        self.bytes_sent = 0
+        self.server = None
+        self.ticker = None
+        self.handlers = set() # Tasks serving the connected clients
+
+    async def start(self, host=HOST, port=PORT):
+        """
+        Starts listening and returns the port, useful when port 0 picked a free one.
+        """
+        self.server = await asyncio.start_server(self.handle, host, port)
+        self.ticker = asyncio.create_task(self.tick_loop())
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """
+        Stops listening and hangs up on every client.
+        """
+        self.ticker.cancel()
+        self.server.close()
+        for session in list(self.sessions.values()):
+            for writer in session.clients:
+                writer.close() # Its handler sees the end of the stream and returns
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def tick_loop(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick = max(next_tick + self.tick_seconds, loop.time()) # Do not catch up on missed ticks
+            await asyncio.sleep(next_tick - loop.time())
+            self.flush()
+
+    def flush(self):
+        """
+        Sends one frame to the clients of every session that had moves since the last tick.
+        """
+        self.tick += 1
+        dirty, self.dirty = self.dirty, set()
+        for session in dirty:
+            body = TICK.pack(self.tick, len(session.pending)) + b"".join(session.pending)
+            frame = message(TICK_MSG, body)
+            session.pending = []
+            for writer in list(session.clients):
+                if writer.transport.get_write_buffer_size() > self.max_buffer:
+                    self.leave(session, writer) # Too slow to keep up, it would only fall further behind
+                    writer.close()
+                    continue
+                writer.write(frame)
+                self.frames += 1
+                self.bytes_sent += len(frame)
+
+    def join(self, body, writer):
+        """
+        Adds a client to its session, creating the session on first use.
+        Returns (session, player id), or raises ValueError for a bad request.
+        """
+        session_id, role, flags, size, bombs, seed = JOIN.unpack(body)
+        session = self.sessions.get(session_id)
+        if session is None:
+            if not 1 <= size <= MAX_SIZE or not 0 <= bombs < size * size:
+                raise ValueError(f"cannot host a {size}x{size} board with {bombs} bombs")
+            session = self.sessions[session_id] = Session(session_id, size, bombs, seed if flags & HAS_SEED else None)
+        player = 0
+        if role == PLAYER:
+            player = session.next_player
+            session.next_player += 1
+        session.clients.append(writer)
+        writer.write(message(WELCOME_MSG, WELCOME.pack(session.id, player, role, session.size, session.bombs)))
+        writer.write(session.catch_up())
+        return session, player
+
+    def leave(self, session, writer):
+        if writer in session.clients:
+            session.clients.remove(writer)
+        if not session.clients and self.sessions.get(session.id) is session:
+            del self.sessions[session.id] # Nobody left to play or watch
+            self.dirty.discard(session)
+
+    async def handle(self, reader, writer):
+        session = None
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        try:
+            kind, body = await read_message(reader, JOIN.size)
+            if kind != JOIN_MSG or len(body) != JOIN.size:
+                raise ValueError("expected a join message")
+            session, player = self.join(body, writer)
+            while True:
+                kind, body = await read_message(reader, ACTION.size)
+                if kind != ACTION_MSG or len(body) != ACTION.size:
+                    raise ValueError("expected an action message")
+                if not player:
+                    continue # Spectators cannot play
+                action, r, c, request = ACTION.unpack(body)
+                if action >= len(ACTIONS):
+                    raise ValueError(f"unknown action {action}")
+                self.actions += 1
+                session.apply(player, request, action, r, c)
+                self.dirty.add(session)
+        except ValueError as error:
+            writer.write(message(ERROR_MSG, str(error).encode()))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass # The client went away
+        finally:
+            if session is not None:
+                self.leave(session, writer)
+            writer.close()
+            self.handlers.discard(task)
+
+class ClientBoard:
+    """
+    A client's copy of a session's board, kept up to date from the move deltas.
+    cells holds one CELL_VALUES byte per cell, row-major.
+    """
+    def __init__(self, size, bombs):
+        self.size = size
+        self.bombs = bombs
+        self.reset()
+
+    def reset(self):
+        self.cells = bytearray([HIDDEN_CELL]) * (self.size * self.size)
+        self.revealed_safe = 0
+        self.lost = False
+        self.scores = {} # Player id -> safe cells that player revealed
+
+    @property
+    def game_over(self):
+        return self.lost or self.revealed_safe == self.size * self.size - self.bombs
+
+    def apply(self, move):
+        if move.event == NEW:
+            self.reset()
+        cells, size = self.cells, self.size
+        revealed = 0
+        for r, c, value in zip(move.rows, move.cols, move.values):
+            i = r * size + c
+            if value <= 8 and cells[i] > 8:
+                revealed += 1
+            elif value == MINE_CELL:
+                self.lost = True
+            cells[i] = value
+        if revealed:
+            self.revealed_safe += revealed
+            self.scores[move.player] = self.scores.get(move.player, 0) + revealed
+
+class GameClient:
+    """
+    Small asyncio client: joins a session, sends actions and applies the
+    deltas it receives to board, a ClientBoard.
+    """
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.welcome = None
+        self.board = None
+        self.bytes_received = 0
+
+    async def connect(self, host=HOST, port=PORT):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+
+    async def join(self, session, role=PLAYER, size=9, bombs=10, seed=None):
+        """
+        Joins (or opens) a session and returns the Welcome. The board is up
+        to date when this returns.
+        """
+        flags = 0 if seed is None else HAS_SEED
+        self.writer.write(message(JOIN_MSG, JOIN.pack(session, role, flags, size, bombs, seed or 0)))
+        kind, body = await self.read()
+        self.welcome = Welcome(*WELCOME.unpack(body))
+        self.board = ClientBoard(self.welcome.size, self.welcome.bombs)
+        await self.read_moves() # The catch-up frame
+        return self.welcome
+
+    def send(self, action, r=0, c=0, request=0):
+        self.writer.write(message(ACTION_MSG, ACTION.pack(ACTION_CODES[action], r, c, request)))
+
+    async def read(self):
+        kind, body = await read_message(self.reader, MAX_FRAME)
+        self.bytes_received += HEADER.size + len(body)
+        if kind == ERROR_MSG:
+            raise ConnectionError(body.decode())
+        return kind, body
+
+    async def read_moves(self):
+        """
+        Waits for the next frame, applies it to the board and returns its moves.
+        """
+        kind, body = await self.read()
+        tick, moves = decode_tick(body)
+        for move in moves:
+            self.board.apply(move)
+        return moves
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+async def serve(host, port, tick_ms, stats_seconds):
+    server = GameServer(tick_ms)
+    port = await server.start(host, port)
+    print(f"Serving Grid Sniffer sessions on {host}:{port}, {tick_ms} ms ticks")
+    last_actions, last_bytes, last_time = 0, 0, time.perf_counter()
+    try:
+        while True:
+            await asyncio.sleep(stats_seconds)
+            now = time.perf_counter()
+            seconds = now - last_time
+            clients = sum(len(session.clients) for session in server.sessions.values())
+            print(f"{len(server.sessions)} sessions, {clients} clients, "
+                  f"{(server.actions - last_actions) / seconds:.0f} actions/sec, "
+                  f"{(server.bytes_sent - last_bytes) / seconds / 1024:.0f} KiB/sec out")
+            last_actions, last_bytes, last_time = server.actions, server.bytes_sent, now
+    finally:
+        await server.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host Grid Sniffer sessions for players and spectators.")
+    parser.add_argument("--host", default=HOST, help=f"address to listen on (default {HOST})")
+    parser.add_argument("--port", type=int, default=PORT, help=f"port to listen on (default {PORT})")
+    parser.add_argument("--tick-ms", type=int, default=TICK_MS, help="milliseconds between two frames of a session")
+    parser.add_argument("--stats", type=float, default=5.0, metavar="SECONDS", help="print server stats this often")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.tick_ms, args.stats))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,56 @@
 #import libraries
+import time
+START_TIME = time.perf_counter() # Start of the time-to-first-frame measurement
+import argparse
+import atexit
+import cProfile
+import io
+import os
 import pygame 
+import pstats
 import random
-import time
-import sys  #to exit the game
+import sys
+from collections import deque
 
-# Initialize pygame modules
-pygame.init()
-pygame.mixer.init()
+from grid_engine import MINES, DIFFICULTIES, Grid_snifferGame, NOTHING, DIG, BOOM, WIN
+from grid_solver import NoGuessBoardPool, Solver, no_guess_board_source
+from grid_chunks import ChunkedGame
+from grid_save import GameRecorder
+from grid_assets import ResourceManager
+from grid_profiler import Profiler
 
 # CONSTANTS 
-MINES = -1 
+NO_GUESS = False # No-guess mode, toggled from the main menu
+BOARD_POOL = None # Pre-generated no-guess boards, created when no-guess mode is first used
 CELL_SIZE = 40 # Size of each cell 
 MARGIN = 5 # Margin between cells
+ZOOM_LEVELS = [(40, 5), (24, 3), (16, 2), (8, 1), (4, 1)] # (cell size, margin) for each zoom level, closest first
+MAX_VIEW_SIZE = 960 # Largest board area in pixels, bigger boards scroll
+PAN_SPEED = 15 # Pixels the view moves per frame while an arrow key is held
+MINIMAP_SIZE = 160 # Width and height of the minimap in pixels
+MINIMAP_SPAN = 256 # Cells covered by the minimap along each side, at most
+BOMB_STEP_MS = 100 # Time between two bombs appearing after a loss
+BOMB_REVEAL_MS = 4000 # Longest the bomb reveal animation after a loss may take
+GAME_OVER_PAUSE_MS = 1500 # Time the revealed bombs stay on screen before the game over screen
+CASCADE_STEP_MS = 8 # Time between two cells of a flood fill appearing
+CASCADE_MS = 400 # Longest a flood fill animation may take
+ENDLESS_SIZE = 1000000 # Endless mode board is ENDLESS_SIZE x ENDLESS_SIZE cells
+ENDLESS_DENSITY = 0.15 # Fraction of mines in endless mode
+SAVE_DIR = "saves" # Where S stores recordings of the current game
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets") # Images and sounds, next to this file
+OVERLAY_REFRESH_MS = 500 # Time between two refreshes of the profiler overlay
+IDLE_TIMEOUT_MS = 1000 # Longest an idle screen sleeps before checking again
+# Posted once a second while a game runs, to update the clock display. One shared
+# Event object: pygame leaks a little memory per set_timer call given a bare event type
+CLOCK_EVENT = pygame.event.Event(pygame.USEREVENT)
+FIRST_FRAME_SHOWN = False # True once the time to the first frame was reported
+PROFILER = None # Active Profiler while profiling is on (F3 overlay or --metrics), else None
+METRICS_PATH = None # Where --metrics writes the profiler summary on exit
+SCENE = {} # Name and clickable parts of the scene on screen, for scripted input such as the soak test
 
-# EXCEPTION HANDLING 
+RESOURCES = ResourceManager() # Cached fonts plus the assets loaded by load_assets
 
 emoji_fonts = ["Segoe UI Emoji", "Apple Color Emoji", "Noto Color Emoji"]
-FONT = None
-for font_name in emoji_fonts:
-    try:
-        FONT = pygame.font.SysFont(font_name, 28) # Try to load the font
-        print("emoji font found works")
-        break
-    except:
-        pass # If font loading fails, try the next one
-if FONT is None:
-    # Fallback to a generic Arial font if no emoji font is found
-    FONT = pygame.font.SysFont("Arial", 28)
-    print("No suitable emoji font found")
-
-# Load sounds (with fallback if sound files are not found)
-try:
-    BOMB_SOUND = pygame.mixer.Sound("assets/bomb_sound.wav")
-    DIG_SOUND = pygame.mixer.Sound("assets/dig_sound.wav")
-except pygame.error:
-    BOMB_SOUND = None
-    DIG_SOUND = None
-    print("Could not load sound files from 'assets/'. Sounds will be disabled.")
 
 # Define colors used in the game
 WHITE = (255, 255, 255)
@@ -49,6 +63,12 @@ BLUE = (0, 0, 255)
 YELLOW = (255, 255, 0)
 OVERLAY_COLOR = (0, 0, 0, 150) # Semi-transparent black for game over screen overlay
 
+def tint(color):
+    """
+    Returns a lighter version of a color, halfway to white.
+    """
+    return tuple((255 + channel) // 2 for channel in color)
+
 # random Colors for bomb explosions 
 BOMB_COLORS = [(255, 192, 203), (221, 160, 221), (144, 238, 144), (255, 255, 224)] # Pink, Plum, Light Green, Light Yellow
 
@@ -65,10 +85,10 @@ NUMBER_COLORS = {
 }
 
 # Function to load images or use emoji as fallback
-def load_img(path, fallback_text):
+def load_img(path, fallback_text, font):
     """
     Loads an image from the given path and scales it, or creates a surface
-    with an emoji if the image fails to load.
+    with an emoji (drawn with font) if the image fails to load.
     """
     try:
         img = pygame.image.load(path)
@@ -76,254 +96,658 @@ def load_img(path, fallback_text):
         scaled_img = pygame.transform.scale(img, (CELL_SIZE - 6, CELL_SIZE - 6))
         print(f"YES Loaded image from: {path}")
         return scaled_img
-    except pygame.error:
+    except (pygame.error, OSError): # pygame 2 raises FileNotFoundError for a missing file
         print(f"NO Failed to load image from: {path}, using emoji: {fallback_text}")
         # Create a transparent surface for the emoji, slightly smaller than cell size
         surface = pygame.Surface((CELL_SIZE - 6, CELL_SIZE - 6), pygame.SRCALPHA)
-        text = FONT.render(fallback_text, True, BLACK)
+        text = font.render(fallback_text, True, BLACK)
         # Center the emoji text on the created surface
         text_rect = text.get_rect(center=(surface.get_width() // 2, surface.get_height() // 2))
         surface.blit(text, text_rect)
         return surface
 
-# Load game assets (flag and bomb images/emojis)
-FLAG_IMAGE = load_img("assets/flag.png", "🚩")
-BOMB_IMAGE = load_img("assets/bomb.png", "💣")
-
-# Game class to manage all logic and state
-class Grid_snifferGame:
-    def __init__(self, size, bombs):
-        self.size = size # Size of the square grid (e.g., 9 for 9x9)
-        self.bombs = bombs # Number of mines to place
-        self.board = self.create_board() # The hidden game board with mines and numbers
-        self.visible = [[False for _ in range(size)] for _ in range(size)] # Tracks which cells are revealed
-        self.flagged = [[False for _ in range(size)] for _ in range(size)] # Tracks which cells are flagged
-        self.dug = set() # Stores coordinates of revealed cells for efficient lookup
-        self.game_over = False # True if the game has ended (win or lose)
-        self.start_time = time.time() # Time when the game started
-        self.victory = False # True if the player won
-
-    def create_board(self):
-        """
-        Initializes the game board, places mines randomly, and calculates
-        neighboring bomb counts for non-mine cells.
-        """
-        board = [[0 for _ in range(self.size)] for _ in range(self.size)] # Initialize all cells to 0
-
-        # Place bombs randomly
-        bombs_planted = 0
-        while bombs_planted < self.bombs:
-            r, c = random.randint(0, self.size - 1), random.randint(0, self.size - 1)
-            if board[r][c] != MINES: # Only place if not already a mine
-                board[r][c] = MINES
-                bombs_planted += 1
-                print(f" AT ROW:{r} COULMN:{c} MINE IS PLACED \n")
-        print(bombs_planted)
-
-        # Calculate neighboring bomb counts for all non-mine cells
-        for r in range(self.size):
-            for c in range(self.size):
-                if board[r][c] == MINES:
-                    continue # Skip if it's a mine
-                board[r][c] = self.count_neighbouring_bombs(r, c, board)
-        return board
-
-    def count_neighbouring_bombs(self, r, c, board):
-        """
-        Counts the number of mines in the 8 surrounding cells of a given cell (r, c).
-        """
-        count = 0
-        size = self.size
-        # Iterate through all 8 neighboring cells (including the cell itself, which is skipped)
-        for i in [r - 1, r, r + 1]:
-            for j in [c - 1, c, c + 1]:
-                if i == r and j == c:
-                    continue # Skip the its own cell
-                # Check if the neighbor is within the board boundaries
-                if 0 <= i < size and 0 <= j < size:
-                    if board[i][j] == MINES:
-                        count += 1
-        return count
-
-    def reveal_cell(self, r, c):
-        """
-        Recursively reveals a cell and its neighbors if it's a '0' (no adjacent mines).
-        """
-        # Do not reveal if already revealed or flagged
-        if (r, c) in self.dug or self.flagged[r][c]:
-            return
+def load_assets(resources):
+    """
+    Loads the game font, sounds and images. main() runs this on a background
+    thread, so the menu is on screen before any of it is needed.
+    Returns a dict with "font", "bomb_sound", "dig_sound", "flag_image" and "bomb_image".
+    """
+    start = time.perf_counter()
+    assets = {}
+
+    # EXCEPTION HANDLING 
+    font = None
+    for font_name in emoji_fonts:
+        if resources.font_path(font_name) is not None: # Only installed fonts have a path
+            font = resources.font(font_name, 28)
+            print("emoji font found works")
+            break
+    if font is None:
+        # Fallback to a generic Arial font if no emoji font is found
+        font = resources.font("Arial", 28)
+        print("No suitable emoji font found")
+    assets["font"] = font
+
+    # Load sounds (with fallback if sound files are not found)
+    try:
+        pygame.mixer.init()
+        assets["bomb_sound"] = pygame.mixer.Sound(os.path.join(ASSET_DIR, "bomb_sound.wav"))
+        assets["dig_sound"] = pygame.mixer.Sound(os.path.join(ASSET_DIR, "dig_sound.wav"))
+    except (pygame.error, OSError): # pygame 2 raises FileNotFoundError for a missing file
+        assets["bomb_sound"] = None
+        assets["dig_sound"] = None
+        print(f"Could not load sound files from '{ASSET_DIR}'. Sounds will be disabled.")
+
+    # Load game assets (flag and bomb images/emojis)
+    assets["flag_image"] = load_img(os.path.join(ASSET_DIR, "flag.png"), "🚩", font)
+    assets["bomb_image"] = load_img(os.path.join(ASSET_DIR, "bomb.png"), "💣", font)
+    print(f"Assets loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return assets
+
+def get_assets():
+    """
+    Returns the loaded assets, waiting for the background loader if needed.
+    Loads them right away when main() did not start the loader.
+    """
+    if RESOURCES.thread is None:
+        RESOURCES.load_in_background(load_assets)
+    return RESOURCES.wait()
+
+# UI functions for drawing the game
+_TILE_ATLASES = {} # Built tile atlases, keyed by cell size
+
+def build_tile_atlas(cell_size):
+    """
+    Pre-composites one surface per cell state so drawing a cell is a single blit.
+    Keys are "hidden", "flag", the numbers 0-8 and ("bomb", i) for each bomb color.
+    Tiles smaller than 12 pixels have no room for images or digits and use
+    plain colors instead.
+    """
+    def tile(color):
+        surface = pygame.Surface((cell_size, cell_size))
+        surface.fill(color)
+        return surface
+
+    assets = get_assets()
+
+    def blit_centered(surface, image):
+        if image.get_width() != cell_size - 6:
+            image = pygame.transform.smoothscale(image, (cell_size - 6, cell_size - 6)) # Match the new cell size
+        surface.blit(image, image.get_rect(center=(cell_size // 2, cell_size // 2)))
 
-        self.dug.add((r, c)) # Add cell to dug
-        self.visible[r][c] = True # Mark cell as visible
-
-        # If the current cell has 0 neighboring bombs,reveal all its neighbors
-        if self.board[r][c] == 0:
-            for dr in [-1, 0, 1]: # change in rows
-                for dc in [-1, 0, 1]: # change in columns
-                    nr = r + dr # Neighbor row
-                    nc = c + dc # Neighbor column
-                    if (nr, nc) == (r, c):
-                        continue # Skip itself
-                    # Check if neighbor is within board boundaries
-                    if 0 <= nr < self.size and 0 <= nc < self.size:
-                        self.reveal_cell(nr, nc) # Recursive call
-
-    def dig(self, r, c):
-        """
-        Handles a 'dig' action (left-click) on a cell.
-        Checks for mines and updates game state.
-        """
-        if self.visible[r][c] or self.flagged[r][c]:
-            return # Do nothing if cell is already visible or flagged
-
-        if self.board[r][c] == MINES:
-            if BOMB_SOUND:
-                BOMB_SOUND.play() # Play bomb sound if available
-            self.game_over = True # Game ends if a mine is dug
-            self.victory = False # Player loses
+    detailed = cell_size >= 12
+    # The number font is sized to the tile, the game font already matches CELL_SIZE
+    font = assets["font"] if cell_size == CELL_SIZE or not detailed else RESOURCES.font("Arial", cell_size * 7 // 10)
+
+    atlas = {}
+    # Unrevealed cell: light gray background with a dark gray border
+    hidden = tile(LIGHT_GRAY)
+    if detailed:
+        pygame.draw.rect(hidden, DARK_GRAY, hidden.get_rect(), 2)
+    atlas["hidden"] = hidden
+    if detailed:
+        flag = hidden.copy()
+        blit_centered(flag, assets["flag_image"])
+    else:
+        flag = tile(RED)
+    atlas["flag"] = flag
+
+    # Revealed cells: white background with the number drawn once per glyph
+    for num in range(9):
+        if num > 0 and not detailed:
+            atlas[num] = tile(tint(NUMBER_COLORS.get(num, BLACK))) # Too small for a digit, tint the tile
+            continue
+        cell = tile(WHITE)
+        if num > 0:
+            text = font.render(str(num), True, NUMBER_COLORS.get(num, BLACK))
+            cell.blit(text, text.get_rect(center=(cell_size // 2, cell_size // 2)))
+        atlas[num] = cell
+
+    # One bomb tile per explosion color
+    for i, color in enumerate(BOMB_COLORS):
+        bomb = tile(color)
+        if detailed:
+            blit_centered(bomb, assets["bomb_image"])
         else:
-            if DIG_SOUND:
-                DIG_SOUND.play() # Play dig sound if available
+            pygame.draw.rect(bomb, BLACK, bomb.get_rect().inflate(-(cell_size // 2), -(cell_size // 2)))
+        atlas[("bomb", i)] = bomb
+
+    if pygame.display.get_surface() is not None:
+        # Match the display pixel format so blits skip the conversion step
+        atlas = {key: surface.convert() for key, surface in atlas.items()}
+    return atlas
+
+def get_tile_atlas(cell_size=None):
+    """
+    Returns the tile atlas for the given cell size (CELL_SIZE by default),
+    building it the first time that size is used.
+    """
+    if cell_size is None:
+        cell_size = CELL_SIZE
+    atlas = _TILE_ATLASES.get(cell_size)
+    if atlas is None:
+        atlas = _TILE_ATLASES[cell_size] = build_tile_atlas(cell_size)
+    return atlas
 
-        self.reveal_cell(r, c) # Always reveal the cell after digging
+def tile_key(game, row, col, bomb_colors):
+    """
+    Returns the atlas key for the cell at (row, col).
+    bomb_colors maps mine cells to their color index and is filled in the
+    first time a mine is shown, so each mine keeps its color for the game.
+    """
+    if not game.visible[row][col]:
+        return "flag" if game.flagged[row][col] else "hidden"
+    value = game.board[row][col]
+    if value != MINES:
+        return value
+    color = bomb_colors.get((row, col))
+    if color is None:
+        color = bomb_colors[(row, col)] = random.randrange(len(BOMB_COLORS)) # Pick a random bomb color
+    return ("bomb", color)
 
-    def is_victory(self):
+class Camera:
+    """
+    Maps between board cells and screen pixels for the part of the board that
+    fits in the view. (x, y) is the board pixel shown at the view's top-left
+    corner, and zoom is an index into ZOOM_LEVELS.
+    """
+    def __init__(self, board_size, width, height, zoom=0):
+        self.board_size = board_size # Board is board_size x board_size cells
+        self.width = width # View width in pixels
+        self.height = height # View height in pixels
+        self.x = 0
+        self.y = 0
+        self.set_zoom(zoom)
+
+    def set_zoom(self, zoom):
         """
-        Checks if the player has won the game.
-        Victory condition: all non-mine cells are visible.
+        Switches to another zoom level, keeping the view inside the board.
         """
-        for r in range(self.size):
-            for c in range(self.size):
-                if self.board[r][c] != MINES and not self.visible[r][c]:
-                    return False # Found an unrevealed non-mine cell, so not yet won
-        return True # display non-mine cells
+        self.zoom = max(0, min(zoom, len(ZOOM_LEVELS) - 1))
+        self.cell_size, self.margin = ZOOM_LEVELS[self.zoom]
+        self.step = self.cell_size + self.margin # Distance between the corners of neighbouring cells
+        self.clamp()
 
-    def reveal_all_bombs(self):
+    def world_size(self):
         """
-        Reveals all bomb locations on the board, called when the game is lost.
+        Returns the width and height of the whole board in pixels at this zoom.
         """
-        for r in range(self.size):
-            for c in range(self.size):
-                if self.board[r][c] == MINES:
-                    self.visible[r][c] = True
-                    draw_board(screen, self)
-                    pygame.display.update()
-                    pygame.time.delay(100)
-     
-    def toggle_flag(self, r, c):
+        return self.board_size * self.step + self.margin
+
+    def fits(self):
         """
-        Toggles the flag on (right-click).
-        Flags can only be placed on unrevealed cells.
+        Returns True when the whole board fits in the view at the closest zoom.
         """
-        if not self.visible[r][c]: # Only allow flagging on unrevealed cells
-            self.flagged[r][c] = not self.flagged[r][c] # Toggle flag state
+        world = self.board_size * (CELL_SIZE + MARGIN) + MARGIN
+        return world <= self.width and world <= self.height
 
-# UI functions for drawing the game
-def draw_board(screen, game):
-    """
-    Draws the entire game board on the Pygame screen.
-    """
-    for row in range(game.size):
-        for col in range(game.size):
-            x = col * (CELL_SIZE + MARGIN) # X-coordinate for the cell's top-left corner
-            y = row * (CELL_SIZE + MARGIN) # Y-coordinate for the cell's top-left corner
-            rect = pygame.Rect(x, y, CELL_SIZE, CELL_SIZE) # Create a rectangle for the cell
-
-            if game.visible[row][col]:
-                # Cell is revealed
-                if game.board[row][col] == MINES:
-                    # It's a mine, draw with a bomb color and image
-                    color = random.choice(BOMB_COLORS) # Pick a random bomb color
-                    pygame.draw.rect(screen, color, rect)
-                    # Center the bomb image within the cell
-                    img_rect = BOMB_IMAGE.get_rect(center=rect.center)
-                    screen.blit(BOMB_IMAGE, img_rect.topleft)
-                else:
-                    # It's a number or empty cell, draw white
-                    pygame.draw.rect(screen, WHITE, rect)
-                    if game.board[row][col] > 0:
-                        # Draw the number if it's greater than 0
-                        num = game.board[row][col]
-                        color = NUMBER_COLORS.get(num, BLACK) # Get color from dictionary, default to black
-                        text = FONT.render(str(num), True, color)
-                        text_rect = text.get_rect(center=rect.center) # Center the text
-                        screen.blit(text, text_rect)
+    def clamp(self):
+        """
+        Keeps the view from scrolling past the edges of the board.
+        """
+        world = self.world_size()
+        self.x = max(0, min(self.x, world - self.width))
+        self.y = max(0, min(self.y, world - self.height))
+
+    def pan(self, dx, dy):
+        """
+        Moves the view by (dx, dy) pixels and returns how far it really moved.
+        """
+        old_x, old_y = self.x, self.y
+        self.x += dx
+        self.y += dy
+        self.clamp()
+        return self.x - old_x, self.y - old_y
+
+    def zoom_at(self, zoom, px, py):
+        """
+        Changes the zoom level, keeping the board point under view pixel (px, py) in place.
+        """
+        wx = (self.x + px) / self.step # Board position under the point, in cells
+        wy = (self.y + py) / self.step
+        self.set_zoom(zoom)
+        self.x = int(wx * self.step) - px
+        self.y = int(wy * self.step) - py
+        self.clamp()
+
+    def center_on(self, row, col):
+        """
+        Moves the view so the given cell is in the middle.
+        """
+        self.x = col * self.step + self.cell_size // 2 - self.width // 2
+        self.y = row * self.step + self.cell_size // 2 - self.height // 2
+        self.clamp()
+
+    def screen_to_cell(self, px, py):
+        """
+        Returns the (row, col) of the cell under view pixel (px, py), or None
+        when the pixel is outside the view or the board.
+        """
+        if not (0 <= px < self.width and 0 <= py < self.height):
+            return None
+        r, c = (self.y + py) // self.step, (self.x + px) // self.step
+        if 0 <= r < self.board_size and 0 <= c < self.board_size:
+            return r, c
+        return None
+
+    def cell_rect(self, row, col):
+        """
+        Returns the rectangle of the cell at (row, col) in view pixels.
+        """
+        return pygame.Rect(col * self.step - self.x, row * self.step - self.y, self.cell_size, self.cell_size)
+
+    def visible_range(self, area=None):
+        """
+        Returns (first row, end row, first col, end col) of the cells that
+        overlap the view, or only the given rectangle of the view.
+        """
+        if area is None:
+            area = pygame.Rect(0, 0, self.width, self.height)
+        step = self.step
+        r0 = max((self.y + area.top) // step, 0)
+        c0 = max((self.x + area.left) // step, 0)
+        r1 = min((self.y + area.bottom - 1) // step + 1, self.board_size)
+        c1 = min((self.x + area.right - 1) // step + 1, self.board_size)
+        return r0, r1, c0, c1
+
+    def is_visible(self, row, col):
+        """
+        Returns True if any part of the cell is inside the view.
+        """
+        return self.cell_rect(row, col).colliderect((0, 0, self.width, self.height))
+
+def draw_board(screen, game, bomb_colors=None, camera=None, area=None, covered=None):
+    """
+    Draws the game board on the Pygame screen in one batched blit.
+    Without a camera the entire board is drawn at full size. With a camera
+    only the cells inside its view (or inside area, a rectangle of the view)
+    are drawn, so the cost depends on the window size and not the board size.
+    covered holds revealed cells that are still drawn hidden, see RevealAnimation.
+    """
+    if bomb_colors is None:
+        bomb_colors = {}
+    if camera is None:
+        atlas = get_tile_atlas()
+        step = CELL_SIZE + MARGIN
+        rows = cols = range(game.size)
+        x0 = y0 = 0
+    else:
+        atlas = get_tile_atlas(camera.cell_size)
+        step = camera.step
+        r0, r1, c0, c1 = camera.visible_range(area)
+        rows, cols = range(r0, r1), range(c0, c1)
+        x0, y0 = camera.x, camera.y
+    hidden, flag = atlas["hidden"], atlas["flag"]
+    tiles = []
+    for row in rows:
+        # Look the row up once, most cells are decided by its visible and flagged flags
+        visible, flagged = game.visible[row], game.flagged[row]
+        y = row * step - y0
+        for col in cols:
+            if visible[col] and not (covered and (row, col) in covered):
+                tile = atlas[tile_key(game, row, col, bomb_colors)]
             else:
-                # Cell is unrevealed
-                pygame.draw.rect(screen, LIGHT_GRAY, rect) # Draw light gray background
-                pygame.draw.rect(screen, DARK_GRAY, rect, 2) # Draw dark gray border
+                tile = flag if flagged[col] else hidden
+            tiles.append((tile, (col * step - x0, y)))
+    screen.blits(tiles, False)
+
+class BoardRenderer:
+    """
+    Retained-mode board renderer. Keeps a cached surface of the part of the
+    board inside the camera's view and only repaints the cells that changed
+    since the last frame. Without a camera the view covers the whole board.
+    """
+    def __init__(self, game, camera=None):
+        self.game = game
+        if camera is None:
+            board_width = game.size * (CELL_SIZE + MARGIN) + MARGIN
+            camera = Camera(game.size, board_width, board_width)
+        self.camera = camera
+        self.bomb_colors = {} # Color index of each shown mine, stable for this game
+        self.covered = set() # Revealed cells still drawn hidden until their animation reaches them
+        self.surface = pygame.Surface((camera.width, camera.height)) # Cached view image
+        self.view_rect = self.surface.get_rect()
+        self.repaint()
+
+    def repaint(self, area=None):
+        """
+        Paints the cells inside the given rectangle of the view, or the whole view.
+        """
+        self.surface.set_clip(area)
+        self.surface.fill(WHITE, area)
+        draw_board(self.surface, self.game, self.bomb_colors, self.camera, area, self.covered)
+        self.surface.set_clip(None)
+
+    def present(self, screen):
+        """
+        Copies the whole cached view to the screen, used for the first frame.
+        """
+        return screen.blit(self.surface, (0, 0))
+
+    def redraw(self, screen):
+        """
+        Repaints the whole view after the camera jumped or zoomed.
+        """
+        self.repaint()
+        return self.present(screen)
+
+    def scroll(self, screen, dx, dy):
+        """
+        Follows a camera pan of (dx, dy) pixels. The cached image is shifted
+        and only the strips that scrolled into view are painted.
+        """
+        width, height = self.view_rect.size
+        if abs(dx) >= width or abs(dy) >= height:
+            return self.redraw(screen)
+        self.surface.scroll(-dx, -dy)
+        if dx:
+            self.repaint(pygame.Rect(width - dx if dx > 0 else 0, 0, abs(dx), height))
+        if dy:
+            self.repaint(pygame.Rect(0, height - dy if dy > 0 else 0, width, abs(dy)))
+        return self.present(screen)
+
+    def update_cells(self, screen, cells):
+        """
+        Repaints the given cells on the cached view, copies them to the screen
+        and returns the dirty rectangles for pygame.display.update.
+        Cells outside the view are skipped.
+        """
+        atlas = get_tile_atlas(self.camera.cell_size)
+        game, covered = self.game, self.covered
+        tiles = []
+        rects = []
+        for row, col in cells:
+            rect = self.camera.cell_rect(row, col)
+            if rect.colliderect(self.view_rect):
+                if (row, col) in covered:
+                    key = "flag" if game.flagged[row][col] else "hidden" # Its animation has not reached it yet
+                else:
+                    key = tile_key(game, row, col, self.bomb_colors)
+                tiles.append((atlas[key], rect))
+                rects.append(rect)
+        self.surface.blits(tiles, False)
+        rects = [rect.clip(self.view_rect) for rect in rects]
+        screen.blits([(self.surface, rect, rect) for rect in rects], False)
+        return rects
+
+class RevealAnimation:
+    """
+    Time-based reveal effects for cells the game has already revealed, such
+    as the bombs after a loss or a large flood fill. Queued cells are drawn
+    as they were (hidden or flagged) until their time comes. advance() is
+    called once per frame and paints only the cells that are due as dirty
+    rectangles, so the event loop keeps running while an effect plays and
+    the cost of a frame does not depend on how many cells are queued.
+    """
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.queues = [] # One deque of (due time, cell) per effect, each in time order
+        self.end_time = 0 # When the last queued cell appears (pygame ticks)
+
+    def add(self, cells, step_ms, max_ms, now=None):
+        """
+        Queues cells to appear in order, step_ms apart but over at most
+        max_ms in total. Cells outside the view have nothing to animate and
+        are left out; they are drawn normally once they scroll into view.
+        """
+        if now is None:
+            now = pygame.time.get_ticks()
+        r0, r1, c0, c1 = self.renderer.camera.visible_range()
+        cells = [(r, c) for r, c in cells if r0 <= r < r1 and c0 <= c < c1]
+        if not cells:
+            return
+        step = min(step_ms, max_ms / len(cells)) # Many cells share the time limit
+        self.queues.append(deque((now + i * step, cell) for i, cell in enumerate(cells)))
+        self.renderer.covered.update(cells)
+        self.end_time = max(self.end_time, now + (len(cells) - 1) * step)
+
+    def busy(self):
+        """
+        Returns True while cells are still waiting to appear.
+        """
+        return bool(self.queues)
+
+    def advance(self, screen, now=None):
+        """
+        Paints the queued cells whose time has come and returns their dirty rectangles.
+        """
+        if now is None:
+            now = pygame.time.get_ticks()
+        due = []
+        for queue in self.queues:
+            while queue and queue[0][0] <= now:
+                due.append(queue.popleft()[1])
+        if not due:
+            return []
+        self.queues = [queue for queue in self.queues if queue]
+        self.renderer.covered.difference_update(due)
+        return self.renderer.update_cells(screen, due)
+
+    def finish(self, screen):
+        """
+        Shows every queued cell at once, used when the player skips the animation.
+        """
+        self.end_time = 0
+        return self.advance(screen, float("inf"))
+
+# Minimap colors, keyed like the tile atlas
+MINIMAP_COLORS = {"hidden": LIGHT_GRAY, "flag": RED, "bomb": BLACK, 0: WHITE}
+MINIMAP_COLORS.update({num: tint(color) for num, color in NUMBER_COLORS.items()})
+
+class Minimap:
+    """
+    Low resolution overview of the board around the camera, one pixel per
+    cell. The pixels are cached and only patched for cells that change; the
+    covered area moves in steps of a quarter of its span as the camera pans.
+    """
+    def __init__(self, game):
+        self.game = game
+        self.span = min(game.size, MINIMAP_SPAN) # Cells covered along each side
+        self.top = None # Board row and col of the minimap's first pixel
+        self.left = None
+        self.pixels = pygame.Surface((self.span, self.span)) # One pixel per cell
+        self.scaled = None # pixels scaled to MINIMAP_SIZE, rebuilt after a change
+        self.rect = pygame.Rect(0, 0, MINIMAP_SIZE, MINIMAP_SIZE)
 
-                if game.flagged[row][col]:
-                    # Draw flag image if cell is flagged
-                    img_rect = FLAG_IMAGE.get_rect(center=rect.center) # Center the flag image
-                    screen.blit(FLAG_IMAGE, img_rect.topleft) # Blit the flag image directly
+    def cell_color(self, row, col):
+        """
+        Returns the minimap color of a cell.
+        """
+        game = self.game
+        if not game.visible[row][col]:
+            return MINIMAP_COLORS["flag" if game.flagged[row][col] else "hidden"]
+        value = game.board[row][col]
+        return MINIMAP_COLORS["bomb" if value == MINES else value]
+
+    def follow(self, camera):
+        """
+        Moves the covered area so it contains the camera's view, rebuilding
+        the pixels only when the area actually moves.
+        """
+        r0, r1, c0, c1 = camera.visible_range()
+        snap = max(self.span // 4, 1)
+        top = max(min((r0 + r1) // 2 - self.span // 2, self.game.size - self.span), 0) // snap * snap
+        left = max(min((c0 + c1) // 2 - self.span // 2, self.game.size - self.span), 0) // snap * snap
+        if (top, left) == (self.top, self.left):
+            return
+        self.top, self.left = top, left
+        game = self.game
+        pixels = bytearray()
+        for row in range(top, top + self.span):
+            visible, flagged, board = game.visible[row], game.flagged[row], game.board[row]
+            for col in range(left, left + self.span):
+                if not visible[col]:
+                    color = MINIMAP_COLORS["flag" if flagged[col] else "hidden"]
+                else:
+                    value = board[col]
+                    color = MINIMAP_COLORS["bomb" if value == MINES else value]
+                pixels += bytes(color)
+        self.pixels = pygame.image.frombuffer(bytes(pixels), (self.span, self.span), "RGB")
+        self.scaled = None
+
+    def patch(self, cells):
+        """
+        Updates the pixels of cells that changed, if they are in the covered area.
+        """
+        if self.top is None:
+            return
+        for row, col in cells:
+            y, x = row - self.top, col - self.left
+            if 0 <= y < self.span and 0 <= x < self.span:
+                self.pixels.set_at((x, y), self.cell_color(row, col))
+                self.scaled = None
+
+    def cell_at(self, px, py):
+        """
+        Returns the board cell shown at screen pixel (px, py) of the minimap.
+        """
+        scale = self.span / MINIMAP_SIZE
+        return self.top + int((py - self.rect.top) * scale), self.left + int((px - self.rect.left) * scale)
+
+    def draw(self, screen, camera):
+        """
+        Draws the minimap in the top-right corner of the view with a frame
+        around the visible area, and returns its rectangle.
+        """
+        self.follow(camera)
+        if self.scaled is None:
+            self.scaled = pygame.transform.scale(self.pixels, (MINIMAP_SIZE, MINIMAP_SIZE))
+        self.rect.topright = (camera.width - 10, 10)
+        screen.blit(self.scaled, self.rect)
+        scale = MINIMAP_SIZE / self.span
+        r0, r1, c0, c1 = camera.visible_range()
+        view = pygame.Rect(
+            self.rect.left + int((c0 - self.left) * scale),
+            self.rect.top + int((r0 - self.top) * scale),
+            max(int((c1 - c0) * scale), 2),
+            max(int((r1 - r0) * scale), 2),
+        ).clip(self.rect)
+        pygame.draw.rect(screen, RED, view, 1)
+        pygame.draw.rect(screen, DARK_GRAY, self.rect, 1)
+        return self.rect
+
+def play_move_sound(event):
+    """
+    Plays the sound for a move event returned by the game engine, if available.
+    """
+    if event == BOOM:
+        sound = RESOURCES.get("bomb_sound")
+        if sound:
+            sound.play() # Play bomb sound if available
+    elif event in (DIG, WIN):
+        sound = RESOURCES.get("dig_sound")
+        if sound:
+            sound.play() # Play dig sound if available
+
+def report_first_frame():
+    """
+    Prints how long it took from starting the program to the first frame on screen, once.
+    """
+    global FIRST_FRAME_SHOWN
+    if not FIRST_FRAME_SHOWN:
+        FIRST_FRAME_SHOWN = True
+        print(f"First frame after {(time.perf_counter() - START_TIME) * 1000:.0f} ms")
+
+def wait_for_events(busy=False):
+    """
+    Returns the events to handle this frame. While something on screen is
+    moving (busy) only the queued events are collected; otherwise this
+    sleeps in pygame.event.wait until input or a timer event arrives, so an
+    idle window uses no CPU.
+    """
+    if busy:
+        return pygame.event.get()
+    event = pygame.event.wait(IDLE_TIMEOUT_MS)
+    if event.type == pygame.NOEVENT:
+        return [] # Timed out without any event
+    return [event] + pygame.event.get()
 
 def main_menu():
     """
     Displays the main menu allowing the player to choose difficulty.
+    Returns the game scene for the chosen level, or None to quit.
     """
-    global screen, WIDTH, HEIGHT
-    WIDTH, HEIGHT = 400, 400 # Fixed window size for the menu
+    global screen, WIDTH, HEIGHT, SCENE
+    WIDTH, HEIGHT = 400, 460 # Fixed window size for the menu
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Grid Sniffer - Select Level")
 
-    # Define difficulty levels: (board_size, number_of_bombs)
-    difficulties = {
-        "Easy": (9, 10),
-        "Medium": (12, 20),
-        "Hard": (16, 40)
-    }
+    difficulties = dict(DIFFICULTIES) # Difficulty levels: (board_size, number_of_bombs)
+    difficulties["Endless"] = (ENDLESS_SIZE, round(ENDLESS_SIZE * ENDLESS_SIZE * ENDLESS_DENSITY))
 
-    menu_font = pygame.font.SysFont("Arial", 36) # Larger font for title
-    instruction_font = pygame.font.SysFont("Arial", 28) # Font for difficulty options
+    global NO_GUESS
+    menu_font = RESOURCES.font("Arial", 36) # Larger font for title
+    instruction_font = RESOURCES.font("Arial", 28) # Font for difficulty options
 
+    redraw = True # The menu is only drawn again when something changed
     while True:
-        screen.fill(WHITE) # Clear screen with white background
+        if redraw:
+            redraw = False
+            screen.fill(WHITE) # Clear screen with white background
+
+            # Draw game title
+            title_text = menu_font.render("GRID SNIFFER", True, BLACK)
+            title_rect = title_text.get_rect(center=(WIDTH // 2, 50))
+            screen.blit(title_text, title_rect)
 
-        # Draw game title
-        title_text = menu_font.render("GRID SNIFFER", True, BLACK)
-        title_rect = title_text.get_rect(center=(WIDTH // 2, 50))
-        screen.blit(title_text, title_rect)
+            y_position_for_text = 150 # Starting Y position for the first option
+            option_rects = [] # To store rectangles of clickable options
 
-        y_position_for_text = 150 # Starting Y position for the first option
-        option_rects = [] # To store rectangles of clickable options
+            # Draw difficulty options
+            for i, (name, (board_size, num_bombs)) in enumerate(difficulties.items()):
+                if board_size == ENDLESS_SIZE:
+                    text_str = f"{name}: huge grid, {ENDLESS_DENSITY:.0%} bombs"
+                else:
+                    text_str = (f"{name}: {board_size}x{board_size} grid, {num_bombs} bombs")
+                text = instruction_font.render(text_str, True, BLACK)
+                rect = text.get_rect(center=(WIDTH // 2, y_position_for_text))
+                screen.blit(text, rect)
+                option_rects.append(rect) # Store rect for click detection
+                y_position_for_text += 60 # Move down for the next option
 
-        # Draw difficulty options
-        for i, (name, (board_size, num_bombs)) in enumerate(difficulties.items()):
-            text_str = (f"{name}: {board_size}x{board_size} grid, {num_bombs} bombs")
-            text = instruction_font.render(text_str, True, BLACK)
-            rect = text.get_rect(center=(WIDTH // 2, y_position_for_text))
-            screen.blit(text, rect)
-            option_rects.append(rect) # Store rect for click detection
-            y_position_for_text += 60 # Move down for the next option
+            # Draw the no-guess mode toggle below the difficulty options
+            mode_text = instruction_font.render(f"No-guess mode: {'ON' if NO_GUESS else 'OFF'}", True, GREEN if NO_GUESS else DARK_GRAY)
+            mode_rect = mode_text.get_rect(center=(WIDTH // 2, y_position_for_text + 10))
+            screen.blit(mode_text, mode_rect)
+            SCENE = {"name": "main_menu", "options": option_rects}
 
-        pygame.display.flip() # Update the full display Surface to the screen
+            pygame.display.flip() # Update the full display Surface to the screen
+            report_first_frame()
 
-        # Event handling for menu
-        for event in pygame.event.get():
+        # Event handling for menu, sleeping until something happens
+        for event in wait_for_events():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit() # Exit the game
+                return None # Exit the game
+            elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                redraw = True # The window was uncovered
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                mx, my = pygame.mouse.get_pos() # Get mouse click position
+                mx, my = event.pos # Get mouse click position
+                if mode_rect.collidepoint(mx, my):
+                    NO_GUESS = not NO_GUESS
+                    redraw = True
+                    if NO_GUESS:
+                        # Start generating boards while the player is still in the menu
+                        for board_size, num_bombs in DIFFICULTIES.values():
+                            get_board_pool().prefill(board_size, num_bombs)
                 for i, rect in enumerate(option_rects):
                     if rect.collidepoint(mx, my): # Check if click is within an option's rectangle
                         chosen_size, chosen_bombs = list(difficulties.values())[i]
-                        game_loop(chosen_size, chosen_bombs) # Directly start the game loop
-                        return # Exit the main_menu loop as game_loop will handle flow
+                        return game_loop, (chosen_size, chosen_bombs) # Start the game loop
 
 def display_game_over_screen(screen, game, final_elapsed_time, current_size, current_bombs):
     """
     Displays the game over screen with win/lose message, final time, and restart options.
+    Returns the scene picked by the player: a new game or the main menu, or None to quit.
     """
+    global SCENE
     overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
     overlay.fill(OVERLAY_COLOR) # Fill with semi-transparent black
     screen.blit(overlay, (0, 0)) # Draw overlay over the current game state
 
     # Fonts for game over screen
-    title_font = pygame.font.SysFont("Arial", 48, bold=True)
-    message_font = pygame.font.SysFont("Arial", 36)
-    button_font = pygame.font.SysFont("Arial", 30)
+    title_font = RESOURCES.font("Arial", 48, bold=True)
+    message_font = RESOURCES.font("Arial", 36)
+    button_font = RESOURCES.font("Arial", 30)
 
     # Determine message and color
     if game.victory:
@@ -364,10 +788,27 @@ def display_game_over_screen(screen, game, final_elapsed_time, current_size, cur
         button_width,
         button_height
     )
+    SCENE = {"name": "game_over", "play_again": play_again_rect, "main_menu": main_menu_rect}
 
+    drawn_hover = None # Hover state of the buttons currently on screen
     while True:
         mouse_pos = pygame.mouse.get_pos()
-        
+        hover = (play_again_rect.collidepoint(mouse_pos), main_menu_rect.collidepoint(mouse_pos))
+        if hover == drawn_hover:
+            # Nothing changed, sleep until the next event
+            for event in wait_for_events():
+                if event.type == pygame.QUIT:
+                    return None
+                elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    drawn_hover = None # Show the screen again after the window was uncovered
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    if play_again_rect.collidepoint(event.pos):
+                        return game_loop, (current_size, current_bombs) # Restart with same difficulty
+                    elif main_menu_rect.collidepoint(event.pos):
+                        return main_menu, () # Go back to main menu
+            continue
+        drawn_hover = hover
+
         # Draw "Play Again" button
         play_again_color = BLUE if play_again_rect.collidepoint(mouse_pos) else (50, 50, 200) # Darker blue on hover
         pygame.draw.rect(screen, play_again_color, play_again_rect, border_radius=10)
@@ -386,90 +827,389 @@ def display_game_over_screen(screen, game, final_elapsed_time, current_size, cur
 
         pygame.display.flip()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if play_again_rect.collidepoint(mouse_pos):
-                    game_loop(current_size, current_bombs) # Restart with same difficulty
-                    return # Exit this display_game_over_screen loop
-                elif main_menu_rect.collidepoint(mouse_pos):
-                    main_menu() # Go back to main menu
-                    return # Exit this display_game_over_screen loop
+def get_board_pool():
+    """
+    Returns the shared pool of pre-generated no-guess boards, starting it on first use.
+    """
+    global BOARD_POOL
+    if BOARD_POOL is None:
+        BOARD_POOL = NoGuessBoardPool()
+        atexit.register(BOARD_POOL.close)
+    return BOARD_POOL
+
+def new_game(size, bombs):
+    """
+    Creates the game for the chosen difficulty. In no-guess mode a ready board
+    is taken from the pool; if none is ready yet, the board is generated
+    around the first click instead. Endless mode uses a chunked board that
+    is only generated where the player explores.
+    """
+    if size >= ENDLESS_SIZE:
+        return ChunkedGame(size, bombs / (size * size), seed=random.randrange(2**32))
+    if not NO_GUESS:
+        return Grid_snifferGame(size, bombs)
+    game = get_board_pool().new_game(size, bombs)
+    if game is None:
+        game = Grid_snifferGame(size, bombs, board_source=no_guess_board_source)
+    return game
+
+def make_move(game, recorder, action, r, c):
+    """
+    Digs or toggles the flag at (r, c) and returns the MoveResult. A move that
+    changed the board is recorded at once, so a snapshot taken on its behalf
+    never includes later moves of the same frame.
+    """
+    result = game.dig(r, c) if action == "dig" else game.toggle_flag(r, c)
+    if recorder is not None and result.event != NOTHING:
+        recorder.record(action, r, c)
+    return result
+
+def save_recording(recorder):
+    """
+    Writes the recording of the current game to SAVE_DIR and returns its path.
+    """
+    os.makedirs(SAVE_DIR, exist_ok=True)
+    path = os.path.join(SAVE_DIR, time.strftime("grid-%Y%m%d-%H%M%S.gsr"))
+    with open(path, "wb") as f:
+        f.write(recorder.file.getvalue())
+    print(f"Saved game to {path}")
+    return path
+
+def enable_profiler():
+    """
+    Starts timing frames and the hot model and drawing functions.
+    """
+    global PROFILER
+    if PROFILER is None:
+        PROFILER = Profiler()
+        PROFILER.instrument(Grid_snifferGame, ["create_board", "reveal_cell", "dig", "toggle_flag", "is_victory"])
+        PROFILER.instrument(ChunkedGame, ["reveal_cell", "dig", "toggle_flag"])
+        PROFILER.instrument(sys.modules[__name__], ["draw_board"], prefix="ui")
+        PROFILER.instrument(BoardRenderer, ["update_cells"])
+    return PROFILER
+
+def disable_profiler():
+    """
+    Stops profiling and restores the original functions, so it costs nothing.
+    """
+    global PROFILER
+    if PROFILER is not None:
+        PROFILER.uninstrument()
+        PROFILER = None
+
+def draw_profiler_overlay(screen, profiler):
+    """
+    Draws the profiler's numbers on a dark panel at the top-left corner
+    and returns the panel's rectangle.
+    """
+    font = RESOURCES.font("Arial", 16)
+    texts = [font.render(line, True, WHITE) for line in profiler.overlay_lines()]
+    line_height = font.get_linesize()
+    panel = pygame.Surface((max(text.get_width() for text in texts) + 12, line_height * len(texts) + 8), pygame.SRCALPHA)
+    panel.fill(OVERLAY_COLOR)
+    for i, text in enumerate(texts):
+        panel.blit(text, (6, 4 + i * line_height))
+    return screen.blit(panel, (5, 5))
 
 def game_loop(size, bombs):
     """
     Main game loop where the game is played.
     Handles user input, updates game state, and draws the board.
+    Boards bigger than the window scroll: arrow keys or a middle-button drag
+    pan the view, the mouse wheel or +/- zooms and M toggles the minimap.
+    S saves a recording of the game so far, which grid_save.py can replay.
+    F3 shows the profiler overlay.
+    Flood fills and the bombs of a lost game appear over a few frames; any
+    click or key during that skips to the game over screen.
+    Returns the game over scene once the game ends, or None to quit.
     """
-    global screen, WIDTH, HEIGHT
-    # Calculate window size based on board size and cell dimensions
-    WIDTH = size * (CELL_SIZE + MARGIN) + MARGIN # Add final margin for consistent spacing
+    global screen, WIDTH, HEIGHT, SCENE
+    # Calculate window size based on board size and cell dimensions, up to MAX_VIEW_SIZE
+    WIDTH = min(size * (CELL_SIZE + MARGIN) + MARGIN, MAX_VIEW_SIZE) # Add final margin for consistent spacing
     HEIGHT = WIDTH + 50 # Extra space at the bottom for timer/info
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Grid Sniffer") # Set window title
-    game = Grid_snifferGame(size, bombs) # Create a new game instance
+    game = new_game(size, bombs) # Create a new game instance
     clock = pygame.time.Clock() # To control frame rate
+    timer_font = get_assets()["font"]
+
+    camera = Camera(size, WIDTH, HEIGHT - 50) # The board area above the timer strip
+    if isinstance(game, ChunkedGame):
+        camera.center_on(size // 2, size // 2) # Start in the middle of the world
+    minimap = Minimap(game)
+    show_minimap = not camera.fits() # The overview only helps when the board scrolls
+    SCENE = {"name": "game_loop", "game": game, "camera": camera}
+
+    # Draw the first frame in full, after that only changed areas are updated
+    screen.fill(WHITE)
+    renderer = BoardRenderer(game, camera)
+    renderer.present(screen)
+    if show_minimap:
+        minimap.draw(screen, camera)
+    pygame.display.flip()
 
+    timer_rect = pygame.Rect(0, HEIGHT - 50, WIDTH, 50) # Bottom strip for the timer
+    shown_time = None # Timer value currently on screen
     final_elapsed_time = 0 # To store the time when the game ends
 
+    # Answers hint requests (H) and drives auto-play (A), not available on endless boards
+    solver = Solver(game) if isinstance(game, Grid_snifferGame) else None
+    # Records every move in memory so S can save the game, not available on endless boards
+    recorder = GameRecorder(game, io.BytesIO()) if isinstance(game, Grid_snifferGame) else None
+    hint_cell = None # Cell currently highlighted as a hint
+    auto_play = False # True while the solver plays the safe moves
+    dragging = False # True while the middle mouse button drags the view
+    animation = RevealAnimation(renderer) # Cells of cascades and the bomb reveal still to appear
+
+    overlay_rect = None # Screen area of the profiler overlay while it is shown
+    overlay_time = 0 # When the overlay numbers were last refreshed (pygame ticks)
+
+    # Sleep between inputs; this timer wakes the loop once a second for the clock display
+    pygame.time.set_timer(CLOCK_EVENT, 1000)
+    busy = False # True while something moves on its own and needs every frame
+
     running = True # Flag to control the main game loop
     while running:
-        screen.fill(WHITE) # Clear screen with white background
-        draw_board(screen, game) # Draw the current state of the game board
+        profiler = PROFILER
+        if profiler:
+            profiler.start_frame()
+        events = wait_for_events(busy)
+        if profiler:
+            profiler.lap("wait")
+        dirty_rects = [] # Screen areas that changed this frame
+        moves = [] # MoveResults of the moves made this frame
+        pan_x, pan_y = 0, 0 # Requested camera movement in pixels
+        zoom = camera.zoom # Requested zoom level
+        zoom_anchor = (camera.width // 2, camera.height // 2) # View point that stays put while zooming
+        jumped = False # True if the camera was moved to a new place
+        skip = False # True if the player skipped the end of game animation
 
-        # Display elapsed time
+        # Event handling for game play
+        for event in events:
+            if event.type == pygame.QUIT:
+                pygame.time.set_timer(CLOCK_EVENT, 0)
+                return None # Exit the game
+            elif game.game_over and event.type in (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN):
+                skip = True # Go straight to the game over screen
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 2: # Middle button drags the view
+                dragging = True
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 2:
+                dragging = False
+            elif event.type == pygame.MOUSEMOTION and dragging:
+                pan_x -= event.rel[0]
+                pan_y -= event.rel[1]
+            elif event.type == pygame.MOUSEWHEEL:
+                zoom -= event.y # Wheel up zooms in
+                zoom_anchor = pygame.mouse.get_pos()
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                x, y = event.pos # Get mouse click position
+                if show_minimap and minimap.rect.collidepoint(x, y):
+                    # Only a left click jumps; the wheel also sends button presses (4 and 5)
+                    if event.button == 1:
+                        camera.center_on(*minimap.cell_at(x, y)) # Jump to the clicked part of the minimap
+                        jumped = True
+                    continue
+                # Map the click through the camera to a board cell, if it hit one
+                cell = camera.screen_to_cell(x, y)
+                if cell is not None:
+                    r, c = cell
+                    if event.button == 1: # Left click (dig)
+                        moves.append(make_move(game, recorder, "dig", r, c))
+                    elif event.button == 3: # Right click (toggle flag)
+                        moves.append(make_move(game, recorder, "flag", r, c))
+            elif event.type == pygame.KEYDOWN:
+                if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    zoom -= 1 # Zoom in
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    zoom += 1 # Zoom out
+                elif event.key == pygame.K_m: # Show or hide the minimap
+                    show_minimap = not show_minimap
+                    dirty_rects.append(renderer.present(screen))
+                elif event.key == pygame.K_s and recorder is not None and recorder.started:
+                    save_recording(recorder)
+                elif event.key == pygame.K_F3: # Show or hide the profiler overlay
+                    if overlay_rect is None:
+                        profiler = enable_profiler()
+                        profiler.start_frame() # Time the rest of this frame too
+                        overlay_rect = pygame.Rect(0, 0, 0, 0)
+                        overlay_time = 0 # Draw it this frame
+                    else:
+                        dirty_rects.append(screen.blit(renderer.surface, overlay_rect, overlay_rect)) # Uncover the board
+                        overlay_rect = None
+                        if METRICS_PATH is None:
+                            disable_profiler()
+                            profiler = None
+                elif solver is None:
+                    pass
+                elif event.key == pygame.K_h: # Show the solver's next move
+                    hint = solver.hint()
+                    if hint is not None:
+                        if hint_cell is not None:
+                            dirty_rects += renderer.update_cells(screen, [hint_cell])
+                        hint_cell = (hint.r, hint.c)
+                        if not camera.is_visible(*hint_cell):
+                            camera.center_on(*hint_cell) # Bring the hinted cell into view
+                            dirty_rects.append(renderer.redraw(screen))
+                        # Green for a proven move, yellow for the safest guess
+                        color = YELLOW if hint.action == "guess" else GREEN
+                        dirty_rects.append(pygame.draw.rect(screen, color, camera.cell_rect(*hint_cell), 3))
+                elif event.key == pygame.K_a: # Toggle auto-play of the proven safe moves
+                    auto_play = not auto_play
+
+        if profiler:
+            profiler.lap("events")
+
+        # Held arrow keys pan the view smoothly
+        keys = pygame.key.get_pressed()
+        pan_x += (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * PAN_SPEED
+        pan_y += (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * PAN_SPEED
+
+        # Move the camera; panning only paints the newly exposed strips
+        view_moved = jumped
+        if zoom != camera.zoom:
+            camera.zoom_at(zoom, *zoom_anchor)
+            view_moved = True
+        if view_moved:
+            dirty_rects.append(renderer.redraw(screen))
+        elif pan_x or pan_y:
+            dx, dy = camera.pan(pan_x, pan_y)
+            if dx or dy:
+                dirty_rects.append(renderer.scroll(screen, dx, dy))
+                view_moved = True
+        if view_moved:
+            hint_cell = None # The highlight was painted over
+
+        # Auto-play makes one proven move per frame and stops before any guess
+        if auto_play and not game.game_over:
+            hint = solver.hint(flags=False)
+            if hint is None or hint.action == "guess":
+                auto_play = False
+            elif hint.action == "unflag":
+                moves.append(make_move(game, recorder, "flag", hint.r, hint.c))
+            else:
+                moves.append(make_move(game, recorder, "dig", hint.r, hint.c))
+
+        for result in moves:
+            play_move_sound(result.event)
+            if len(result.cells) > 1:
+                animation.add(result.cells, CASCADE_STEP_MS, CASCADE_MS) # Let the flood fill spread out
+            else:
+                dirty_rects += renderer.update_cells(screen, result.cells)
+            minimap.patch(result.cells)
+            if result.event == BOOM:
+                # Reveal the other bombs one by one, zoomed out views show many bombs faster
+                mines = game.reveal_all_bombs()
+                animation.add(mines, BOMB_STEP_MS, BOMB_REVEAL_MS)
+                minimap.patch(mines)
+            if hint_cell is not None and result.cells:
+                dirty_rects += renderer.update_cells(screen, [hint_cell]) # Clear the old hint
+                hint_cell = None
+
+        # Paint the animated cells that are due this frame
+        if skip:
+            dirty_rects += animation.finish(screen)
+        elif animation.busy():
+            dirty_rects += animation.advance(screen)
+
+        if profiler:
+            profiler.lap("update")
+
+        # Keep the minimap on top of anything drawn under it
+        if show_minimap and (view_moved or moves or minimap.rect.collidelist(dirty_rects) != -1):
+            dirty_rects.append(minimap.draw(screen, camera))
+
+        # Display elapsed time, redrawn only when the shown second changes
         if not game.game_over:
             elapsed = int(time.time() - game.start_time)
             final_elapsed_time = elapsed # Continuously update final_elapsed_time until game over
-        timer_text = FONT.render(f"Time: {final_elapsed_time}s", True, BLACK)
-        screen.blit(timer_text, (10, HEIGHT - 40)) # Position timer at bottom-left
-      
+        if final_elapsed_time != shown_time:
+            shown_time = final_elapsed_time
+            screen.fill(WHITE, timer_rect)
+            timer_text = timer_font.render(f"Time: {final_elapsed_time}s", True, BLACK)
+            screen.blit(timer_text, (10, HEIGHT - 40)) # Position timer at bottom-left
+            dirty_rects.append(timer_rect)
 
-        # Check for victory condition (only if game is not already over)
-        if not game.game_over:
-            if game.is_victory():
-                game.game_over = True # Set game_over to True
-                game.victory = True # Player won
-
-        # If game is over, set running to False to exit the loop
+        # Once the game is over and the animation has played, leave the loop.
+        # After a loss the bombs stay on screen for a moment first.
         if game.game_over:
-            running = False # Exit the game loop
+            pause = 0 if game.victory else GAME_OVER_PAUSE_MS
+            if skip or pygame.time.get_ticks() >= animation.end_time + pause:
+                running = False # Exit the game loop
 
-        # Event handling for game play
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit() # Exit the game
-            elif event.type == pygame.MOUSEBUTTONDOWN and not game.game_over:
-                # Only process clicks if the game is not over
-                x, y = pygame.mouse.get_pos() # Get mouse click position
-                # Ensure click is within the game board area (above the timer/info area)
-                if y < size * (CELL_SIZE + MARGIN):
-                    r, c = y // (CELL_SIZE + MARGIN), x // (CELL_SIZE + MARGIN)
-                    # Ensure calculated coordinates are within board bounds
-                    if 0 <= r < size and 0 <= c < size:
-                        if event.button == 1: # Left click (dig)
-                            game.dig(r, c)
-                        elif event.button == 3: # Right click (toggle flag)
-                            game.toggle_flag(r, c)
-
-        pygame.display.flip() # Update the full display Surface to the screen
+        # Refresh the profiler overlay a few times a second, or when it was drawn over
+        if overlay_rect is not None:
+            now = pygame.time.get_ticks()
+            if now - overlay_time >= OVERLAY_REFRESH_MS or overlay_rect.collidelist(dirty_rects) != -1:
+                overlay_time = now
+                dirty_rects.append(screen.blit(renderer.surface, overlay_rect, overlay_rect)) # Clear the old numbers
+                overlay_rect = draw_profiler_overlay(screen, profiler)
+                dirty_rects.append(overlay_rect)
+
+        if profiler:
+            profiler.lap("hud")
+        if dirty_rects:
+            pygame.display.update(dirty_rects) # Push only the changed areas to the screen
+        if profiler:
+            profiler.lap("display")
         clock.tick(30) # Limit frame rate 
+        if profiler:
+            profiler.lap("idle")
+
+        # Keep running frames while auto-play works, cells are animated, the
+        # game over pause runs or an arrow key pans the view
+        busy = (auto_play or animation.busy() or game.game_over
+                or keys[pygame.K_LEFT] or keys[pygame.K_RIGHT] or keys[pygame.K_UP] or keys[pygame.K_DOWN])
 
-    # After the game loop ends (game_over is True)
-    if not game.victory:
-        game.reveal_all_bombs() # Reveal all bomb locations when game is lost
-        draw_board(screen, game) # Redraw the board to show revealed bombs
-        pygame.display.flip() # Update display to show bombs
-        pygame.time.delay(1500) # Pause for a moment to let player see the bombs
+    pygame.time.set_timer(CLOCK_EVENT, 0) # Stop the clock timer
 
     # Display the custom game over screen
-    display_game_over_screen(screen, game, final_elapsed_time, size, bombs)
+    return display_game_over_screen, (screen, game, final_elapsed_time, size, bombs)
 
-def main():
-    main_menu() # Start the main menu; which handle starting game_loop or exiting
+def run_scenes(scene, *args):
+    """
+    Runs the screens of the game one after another. A scene is a function
+    such as main_menu, game_loop or display_game_over_screen; it returns the
+    next scene as (function, args), or None to quit. Scenes never call each
+    other, so the call stack stays flat and a finished game is freed as soon
+    as the next scene starts, however many rounds are played.
+    """
+    next_scene = (scene, args)
+    while next_scene is not None:
+        scene, args = next_scene
+        next_scene = scene(*args)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grid Sniffer, sniff the grid and dodge the boom.")
+    parser.add_argument("--profile", nargs="?", const="-", metavar="PATH", help="run under cProfile and print the slowest functions on exit, or save the stats to PATH")
+    parser.add_argument("--metrics", metavar="PATH", help="time frames and moves for the whole session and write them to PATH (.json or .csv) on exit")
+    args = parser.parse_args(argv)
+
+    global METRICS_PATH
+    if args.metrics:
+        METRICS_PATH = args.metrics
+        enable_profiler()
+    profile = cProfile.Profile() if args.profile else None
+    if profile:
+        profile.enable()
+    try:
+        # Initialize only what the menu needs, the mixer starts with the other assets
+        pygame.display.init()
+        pygame.font.init()
+        RESOURCES.load_in_background(load_assets) # Load fonts, sounds and images while the menu shows
+        run_scenes(main_menu) # Start at the main menu and run until the player quits
+        pygame.quit()
+    finally:
+        # Written here so the reports are kept even if the game stops with an error
+        if profile:
+            profile.disable()
+        if METRICS_PATH and PROFILER:
+            PROFILER.write_metrics(METRICS_PATH)
+            print(f"Wrote metrics to {METRICS_PATH}")
+        if profile:
+            if args.profile == "-":
+                pstats.Stats(profile).sort_stats("cumulative").print_stats(25)
+            else:
+                profile.dump_stats(args.profile)
 
 if __name__ == "__main__":
     main() # Run the main function
@@ -0,0 +1,618 @@
+# Constraint-propagation solver and hint engine for Grid Sniffer.
+# Works only on what the player can see (revealed numbers), never on hidden
+# mines, so its hints are fair. Player flags are ignored by the logic, since
+# they may be wrong; the solver keeps its own sets of proven safe cells and mines.
+import math
+import random
+import weakref
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from grid_engine import Grid_snifferGame, game_seed
+
+# A hint: action is "dig" (proven safe), "flag" (proven mine), "guess"
+# (no safe cell is known, this is the cell least likely to be a mine) or
+# "unflag" (a player flag sits on the cell that should be dug next).
+# probability is the chance that the cell is a mine.
+Hint = namedtuple("Hint", ["action", "r", "c", "probability"])
+
+MAX_COMPONENT_CELLS = 40 # Larger frontier groups are not enumerated exactly
+MAX_ENUMERATION_NODES = 15000 # Search budget for one frontier group
+MAX_CACHED_COMPONENTS = 4096 # Memoised frontier groups kept between hints
+
+class Solver:
+    """
+    Incremental solver for one game.
+
+    Cells are flat indexes (r * size + c). Every revealed number is a
+    constraint: its hidden, unproven neighbours hold a known number of mines.
+    Rules are applied in order of cost: single-cell rules, then subset/pair
+    rules between overlapping constraints, then exact probability enumeration
+    of each independent frontier group. Only constraints around cells that
+    changed since the last call are re-evaluated, and enumeration results are
+    memoised per frontier group.
+    """
+    def __init__(self, game):
+        self.game = game
+        self.size = game.size
+        self.safe = set() # Hidden cells proven to be safe
+        self.mines = set() # Cells proven to be mines
+        self.constraints = {} # Number cell -> (frozenset of unknown cells, mines left among them)
+        self.dirty = set() # Number cells whose constraint has to be rebuilt
+        self.unpaired = set() # Constraints not yet checked against their neighbours
+        self.component_cache = {} # Frontier group signature -> enumeration result
+        self.probabilities = None # Cell -> mine probability, valid until the next change
+        self.outside_probability = None # Mine probability of hidden cells away from the frontier
+        self.move_count = game.move_count # Last game move the solver has seen
+        self.seen_dug = bytearray(game.dug) # Revealed cells as of that move
+        self.rebuild()
+
+    def neighbours(self, i):
+        """
+        Returns the flat indexes of the up to 8 cells around cell i.
+        """
+        size = self.size
+        r, c = divmod(i, size)
+        return [
+            nr * size + nc
+            for nr in range(max(r - 1, 0), min(r + 2, size))
+            for nc in range(max(c - 1, 0), min(c + 2, size))
+            if nr != r or nc != c
+        ]
+
+    def is_number(self, i):
+        """
+        Returns True if cell i is a revealed number, i.e. a constraint.
+        """
+        r, c = divmod(i, self.size)
+        return self.game.visible[r][c] and self.game.board[r][c] > 0
+
+    def rebuild(self):
+        """
+        Re-reads every revealed number on the board. Proven cells stay proven,
+        because the mines never move during a game.
+        """
+        size = self.size
+        board, visible = self.game.board, self.game.visible
+        self.constraints.clear()
+        self.safe = {i for i in self.safe if not self.game.dug[i]}
+        self.dirty = {
+            r * size + c
+            for r in range(size)
+            for c in range(size)
+            if visible[r][c] and board[r][c] > 0
+        }
+        self.unpaired = set(self.dirty)
+        self.probabilities = None
+        self.move_count = self.game.move_count
+        self.seen_dug = bytearray(self.game.dug)
+
+    def update(self, cells):
+        """
+        Tells the solver which (row, col) cells were revealed by a move, so
+        only the constraints around them are re-evaluated.
+        """
+        size = self.size
+        dirty = self.dirty
+        for r, c in cells:
+            i = r * size + c
+            self.safe.discard(i)
+            if self.is_number(i):
+                dirty.add(i)
+            for j in self.neighbours(i):
+                if j in self.constraints or self.is_number(j):
+                    dirty.add(j)
+        self.probabilities = None
+
+    def sync(self):
+        """
+        Catches up with moves made on the game since the solver last looked.
+        """
+        game = self.game
+        if game.move_count == self.move_count:
+            return
+        if game.move_count == self.move_count + 1 and game.last_result is not None:
+            self.update(game.last_result.cells) # The common case: one move since last time
+        else:
+            # Several moves: compare the revealed mask row by row to find what changed
+            size = self.size
+            dug, seen = game.dug, self.seen_dug
+            changed = []
+            for start in range(0, size * size, size):
+                if dug[start:start + size] != seen[start:start + size]:
+                    changed += [divmod(i, size) for i in range(start, start + size) if dug[i] != seen[i]]
+            self.update(changed)
+        self.move_count = game.move_count
+        self.seen_dug[:] = game.dug
+
+    def build_constraint(self, i):
+        """
+        Returns (unknown cells, mines left) for the revealed number at cell i.
+        """
+        visible = self.game.visible
+        size = self.size
+        r, c = divmod(i, size)
+        left = self.game.board[r][c]
+        unknown = []
+        for j in self.neighbours(i):
+            if visible[j // size][j % size] or j in self.safe:
+                continue
+            if j in self.mines:
+                left -= 1
+            else:
+                unknown.append(j)
+        return frozenset(unknown), left
+
+    def mark(self, cells, is_mine):
+        """
+        Records cells as proven mines or proven safe cells and marks the
+        constraints around them for re-evaluation.
+        """
+        known = self.mines if is_mine else self.safe
+        for j in cells:
+            if j in self.mines or j in self.safe:
+                continue
+            known.add(j)
+            for k in self.neighbours(j):
+                if k in self.constraints:
+                    self.dirty.add(k)
+        self.probabilities = None
+
+    def propagate(self):
+        """
+        Applies the single-cell and subset/pair rules until nothing new is proven.
+        Returns True if any cell was proven.
+        """
+        proved = False
+        constraints = self.constraints
+        while self.dirty or self.unpaired:
+            # Single-cell rules on every constraint that changed
+            while self.dirty:
+                i = self.dirty.pop()
+                unknown, left = self.build_constraint(i)
+                if not unknown:
+                    constraints.pop(i, None)
+                    continue
+                if left == 0:
+                    constraints.pop(i, None)
+                    self.mark(unknown, False) # Every mine is accounted for
+                    proved = True
+                elif left == len(unknown):
+                    constraints.pop(i, None)
+                    self.mark(unknown, True) # Every unknown cell must be a mine
+                    proved = True
+                else:
+                    constraints[i] = (unknown, left)
+                    self.unpaired.add(i)
+
+            # Subset/pair rules between a changed constraint and its overlapping neighbours
+            while self.unpaired and not self.dirty:
+                i = self.unpaired.pop()
+                if i not in constraints:
+                    continue
+                a_cells, a_left = constraints[i]
+                others = {k for j in a_cells for k in self.neighbours(j) if k != i and k in constraints}
+                for k in others:
+                    b_cells, b_left = constraints[k]
+                    only_a = a_cells - b_cells
+                    only_b = b_cells - a_cells
+                    # Mines in B but not A are at least b_left - a_left; if that fills
+                    # B - A exactly, those are mines and A - B must be safe (and vice versa)
+                    if only_b and b_left - a_left == len(only_b):
+                        self.mark(only_b, True)
+                        self.mark(only_a, False)
+                    elif only_a and a_left - b_left == len(only_a):
+                        self.mark(only_a, True)
+                        self.mark(only_b, False)
+                    elif not only_a and only_b and b_left == a_left:
+                        self.mark(only_b, False) # A is a subset of B with the same mine count
+                    elif not only_b and only_a and a_left == b_left:
+                        self.mark(only_a, False)
+                    else:
+                        continue
+                    proved = True
+                    break
+        return proved
+
+    def components(self):
+        """
+        Splits the frontier into independent groups of constraints that share
+        unknown cells. Returns a list of (cells, constraints) pairs.
+        """
+        cell_constraints = {}
+        for i, (unknown, _) in self.constraints.items():
+            for j in unknown:
+                cell_constraints.setdefault(j, []).append(i)
+        groups = []
+        seen = set()
+        for start in cell_constraints:
+            if start in seen:
+                continue
+            seen.add(start)
+            cells = [start] # Breadth first order keeps the search tightly constrained
+            group_constraints = set()
+            for j in cells:
+                for i in cell_constraints[j]:
+                    if i in group_constraints:
+                        continue
+                    group_constraints.add(i)
+                    for k in self.constraints[i][0]:
+                        if k not in seen:
+                            seen.add(k)
+                            cells.append(k)
+            groups.append((cells, [self.constraints[i] for i in group_constraints]))
+        return groups
+
+    def enumerate_component(self, cells, constraints):
+        """
+        Counts every mine arrangement of one frontier group that satisfies all
+        of its constraints. Returns (ways, cell_counts) where ways[k] is the
+        number of arrangements with k mines and cell_counts[k][n] how many of
+        those put a mine on cells[n], or None if the group is too large.
+        """
+        key = frozenset(constraints)
+        if key in self.component_cache:
+            return self.component_cache[key]
+        if len(cells) > MAX_COMPONENT_CELLS:
+            return None
+
+        position = {cell: n for n, cell in enumerate(cells)}
+        need = [left for _, left in constraints] # Mines still needed per constraint
+        free = [len(unknown) for unknown, _ in constraints] # Unassigned cells per constraint
+        cell_constraints = [[] for _ in cells]
+        for j, (unknown, _) in enumerate(constraints):
+            for cell in unknown:
+                cell_constraints[position[cell]].append(j)
+
+        count = len(cells)
+        assignment = [0] * count
+        ways = {}
+        cell_counts = {}
+        budget = [MAX_ENUMERATION_NODES]
+
+        def place(n, mines):
+            if n == count:
+                ways[mines] = ways.get(mines, 0) + 1
+                counts = cell_counts.get(mines)
+                if counts is None:
+                    counts = cell_counts[mines] = [0] * count
+                for m in range(count):
+                    counts[m] += assignment[m]
+                return True
+            budget[0] -= 1
+            if budget[0] < 0:
+                return False # Too many arrangements, give up on this group
+            linked = cell_constraints[n]
+            for value in (0, 1):
+                # The cell may take this value if every constraint stays satisfiable
+                if all(0 <= need[j] - value <= free[j] - 1 for j in linked):
+                    for j in linked:
+                        need[j] -= value
+                        free[j] -= 1
+                    assignment[n] = value
+                    finished = place(n + 1, mines + value)
+                    for j in linked:
+                        need[j] += value
+                        free[j] += 1
+                    if not finished:
+                        return False
+            assignment[n] = 0
+            return True
+
+        result = (ways, cell_counts) if place(0, 0) else None
+        if len(self.component_cache) >= MAX_CACHED_COMPONENTS:
+            self.component_cache.clear()
+        self.component_cache[key] = result
+        return result
+
+    def mine_probabilities(self):
+        """
+        Computes the exact mine probability of every frontier cell, taking the
+        total number of mines into account. Returns a dict of cell -> probability
+        and sets self.outside_probability for hidden cells off the frontier.
+        Cells proven safe or mined along the way are recorded as such.
+        """
+        if self.probabilities is not None:
+            return self.probabilities
+        game = self.game
+        hidden = game.size * game.size - game.revealed_safe
+        mines_left = game.bombs - len(self.mines)
+
+        groups = []
+        outside = hidden - len(self.mines) - len(self.safe)
+        for cells, constraints in self.components():
+            result = self.enumerate_component(cells, constraints)
+            if result is None:
+                continue # Too large: its cells are treated like off-frontier cells
+            groups.append((cells, result))
+            outside -= len(cells)
+
+        def log_ways(mines_elsewhere):
+            # Log of the ways to place the remaining mines on the off-frontier cells
+            rest = mines_left - mines_elsewhere
+            if not 0 <= rest <= outside:
+                return None
+            return math.lgamma(outside + 1) - math.lgamma(rest + 1) - math.lgamma(outside - rest + 1)
+
+        # The binomials get huge on big boards, so weigh them as floats relative to the largest
+        most_mines = sum(max(ways) for _, (ways, _) in groups)
+        logs = [log_ways(k) for k in range(most_mines + 1)]
+        top = max((value for value in logs if value is not None), default=0.0)
+        weights = [0.0 if value is None else math.exp(value - top) for value in logs]
+
+        def weight(mines_elsewhere):
+            return weights[mines_elsewhere]
+
+        def convolve(a, b):
+            out = {}
+            for ka, wa in a.items():
+                for kb, wb in b.items():
+                    out[ka + kb] = out.get(ka + kb, 0) + wa * wb
+            return out
+
+        # prefix[n] combines groups before n and suffix[n] groups from n on,
+        # so each group can be weighed against all the others
+        prefix = [{0: 1}]
+        for _, (ways, _) in groups:
+            prefix.append(convolve(prefix[-1], ways))
+        suffix = [{0: 1}]
+        for _, (ways, _) in reversed(groups):
+            suffix.append(convolve(suffix[-1], ways))
+        suffix.reverse()
+
+        total = sum(w * weight(k) for k, w in prefix[-1].items())
+        probabilities = {}
+        proved = False
+        if total == 0:
+            self.outside_probability = mines_left / outside if outside > 0 else 1.0
+            self.probabilities = probabilities
+            return probabilities
+
+        for n, (cells, (ways, cell_counts)) in enumerate(groups):
+            others = convolve(prefix[n], suffix[n + 1])
+            factor = {k: sum(w * weight(k + s) for s, w in others.items()) for k in ways}
+            possible = [k for k in ways if factor[k] > 0] # Mine counts the rest of the board allows
+            safe, mines = [], []
+            for m, cell in enumerate(cells):
+                # Proofs use the exact counts, the floats only rank the guesses
+                if all(cell_counts[k][m] == 0 for k in possible):
+                    safe.append(cell)
+                elif all(cell_counts[k][m] == ways[k] for k in possible):
+                    mines.append(cell)
+                probabilities[cell] = sum(cell_counts[k][m] * factor[k] for k in ways) / total
+            if safe or mines:
+                self.mark(safe, False)
+                self.mark(mines, True)
+                proved = True
+
+        if outside > 0:
+            expected = sum(w * weight(k) * (mines_left - k) for k, w in prefix[-1].items())
+            self.outside_probability = expected / total / outside
+        else:
+            self.outside_probability = 1.0
+        # New proofs change the constraints, so only cache a result that proved nothing
+        self.probabilities = None if proved else probabilities
+        return probabilities
+
+    def hidden_choice(self, cells):
+        """
+        Returns the first cell of cells that is still hidden and not flagged.
+        """
+        game = self.game
+        size = self.size
+        for i in cells:
+            r, c = divmod(i, size)
+            if not game.dug[i] and not game.flagged[r][c]:
+                return i
+        return None
+
+    def outside_cell(self):
+        """
+        Picks a hidden, unflagged cell away from the frontier, trying the
+        corners first because they are the most likely to open a region.
+        """
+        game = self.game
+        size = self.size
+        frontier = self.probabilities or {}
+
+        def usable(i):
+            r, c = divmod(i, size)
+            return (not game.dug[i] and not game.flagged[r][c] and i not in frontier
+                    and i not in self.mines and i not in self.safe)
+
+        last = size * size - 1
+        for i in (0, size - 1, last - size + 1, last):
+            if usable(i):
+                return i
+        i = game.dug.find(0)
+        while i != -1:
+            if usable(i):
+                return i
+            i = game.dug.find(0, i + 1)
+        return None
+
+    def hint(self, flags=True):
+        """
+        Returns the next move as a Hint, or None when the game is over.
+        A proven safe cell comes first, then (if flags is True) a proven mine
+        that is not flagged yet, and otherwise the safest guess.
+        """
+        game = self.game
+        if game.game_over:
+            return None
+        self.sync()
+        self.propagate()
+        size = self.size
+
+        while True:
+            i = self.hidden_choice(sorted(self.safe))
+            if i is not None:
+                return Hint("dig", i // size, i % size, 0.0)
+            for i in sorted(self.safe):
+                if not game.dug[i]:
+                    return Hint("unflag", i // size, i % size, 0.0) # The player flagged a safe cell
+            if flags:
+                for i in sorted(self.mines):
+                    r, c = divmod(i, size)
+                    if not game.flagged[r][c]:
+                        return Hint("flag", r, c, 1.0)
+            known = len(self.safe) + len(self.mines)
+            probabilities = self.mine_probabilities()
+            if len(self.safe) + len(self.mines) == known:
+                break # Enumeration proved nothing new
+            self.propagate() # New proofs may unlock the cheap rules again
+
+        # Guess: the frontier cell least likely to be a mine, or an outside cell
+        best = None
+        for i, probability in sorted(probabilities.items(), key=lambda item: (item[1], item[0])):
+            if self.hidden_choice([i]) is not None:
+                best = (probability, i)
+                break
+        outside = self.outside_cell()
+        if outside is not None and (best is None or self.outside_probability < best[0]):
+            best = (self.outside_probability, outside)
+        if best is not None:
+            return Hint("guess", best[1] // size, best[1] % size, best[0])
+
+        # Every unproven hidden cell carries a player flag, so one of them is wrong
+        i = game.dug.find(0)
+        while i != -1:
+            if i not in self.mines:
+                probability = probabilities.get(i, self.outside_probability)
+                return Hint("unflag", i // size, i % size, probability)
+            i = game.dug.find(0, i + 1)
+        return None
+
+    def auto_play(self, guess=True, max_moves=None):
+        """
+        Plays the game with the solver's hints until it ends, it gets stuck
+        (guess=False stops before the first guess) or max_moves is reached.
+        Returns the number of moves made.
+        """
+        game = self.game
+        moves = 0
+        while not game.game_over and (max_moves is None or moves < max_moves):
+            hint = self.hint(flags=False)
+            if hint is None or (hint.action == "guess" and not guess):
+                break
+            if hint.action == "unflag":
+                game.toggle_flag(hint.r, hint.c)
+            else:
+                game.dig(hint.r, hint.c)
+            moves += 1
+        return moves
+
+_SOLVERS = weakref.WeakKeyDictionary() # One solver per game for solver_strategy
+
+def solver_for(game):
+    """
+    Returns the solver attached to a game, creating it on first use.
+    """
+    solver = _SOLVERS.get(game)
+    if solver is None:
+        solver = _SOLVERS[game] = Solver(game)
+    return solver
+
+def solver_strategy(game, rng):
+    """
+    Batch simulator strategy that follows the solver's hints, never flagging.
+    """
+    hint = solver_for(game).hint(flags=False)
+    if hint.action == "unflag":
+        return ("flag", hint.r, hint.c) # Toggling removes the wrong flag
+    return ("dig", hint.r, hint.c)
+
+def strategies():
+    """
+    Returns the strategies of this module by name, to add to the engine's
+    STRATEGIES in grid_benchmark and other command-line tools.
+    """
+    return {"solver": solver_strategy}
+
+MAX_NO_GUESS_ATTEMPTS = 2000 # Candidate boards tried before giving up on a no-guess board
+
+def generate_no_guess_board(size, bombs, start, seed=None, max_attempts=MAX_NO_GUESS_ATTEMPTS):
+    """
+    Generates a board that the solver can clear from the start cell without
+    a single guess. The start cell and its neighbours are always mine-free,
+    so the first click opens a region. Each candidate is played by the solver
+    and rejected at its first guess. Returns the board, or None when no
+    candidate passed within max_attempts.
+    """
+    for attempt in range(max_attempts):
+        candidate_seed = None if seed is None else game_seed(seed, attempt)
+        game = Grid_snifferGame(size, bombs, candidate_seed, safe_first_click=True)
+        game.dig(*start) # Places the mines around the start cell and opens it
+        Solver(game).auto_play(guess=False) # Stops early at the first guess
+        if game.victory:
+            return game.board # The mines never move, so the played board is still fresh
+    return None
+
+def no_guess_board_source(size, bombs, start, seed=None):
+    """
+    Board source for Grid_snifferGame that builds a no-guess board around the
+    first click, falling back to a plain safe-first-click board if the
+    density is too high to find one.
+    """
+    board = generate_no_guess_board(size, bombs, start, seed)
+    if board is None:
+        game = Grid_snifferGame(size, bombs, seed)
+        board = game.create_board(game.safe_zone(*start))
+    return board
+
+def pool_board(size, bombs, seed):
+    """
+    Worker job for NoGuessBoardPool: picks a start cell away from the edges
+    and generates a no-guess board for it. Returns (board, start), or None.
+    """
+    rng = random.Random(seed)
+    margin = 1 if size > 2 else 0
+    start = (rng.randint(margin, size - 1 - margin), rng.randint(margin, size - 1 - margin))
+    board = generate_no_guess_board(size, bombs, start, seed)
+    if board is None:
+        return None
+    return [list(row) for row in board], start # Row views cannot be sent back from a worker process
+
+class NoGuessBoardPool:
+    """
+    Keeps a queue of pre-generated no-guess boards per difficulty, filled in the
+    background by worker processes so starting a game adds no latency.
+    Pooled boards come with their start cell already opened, because the
+    board was proven solvable from that cell and not from the player's click.
+    """
+    def __init__(self, depth=2, workers=1):
+        self.depth = depth # Boards kept ready per (size, bombs)
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.queues = {} # (size, bombs) -> deque of futures
+
+    def prefill(self, size, bombs):
+        """
+        Tops up the queue for one difficulty to the pool depth.
+        """
+        queue = self.queues.setdefault((size, bombs), deque())
+        while len(queue) < self.depth:
+            queue.append(self.executor.submit(pool_board, size, bombs, random.getrandbits(64)))
+
+    def new_game(self, size, bombs):
+        """
+        Returns a new game on a ready board with its start cell opened,
+        or None if no board is ready yet (the caller can then fall back to
+        generating on the first click). Always schedules a replacement.
+        """
+        queue = self.queues.get((size, bombs))
+        game = None
+        if queue and queue[0].done():
+            generated = queue.popleft().result()
+            if generated is not None:
+                board, start = generated
+                game = Grid_snifferGame(size, bombs, safe_first_click=True)
+                game.adopt_board(board)
+                game.dig(*start)
+        self.prefill(size, bombs)
+        return game
+
+    def close(self):
+        """
+        Stops the worker processes, dropping boards that are still queued.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,14 @@
+# Shared setup for the tests.
+# Rendering runs headless through SDL's dummy drivers, and the game modules
+# are imported from the top of the repository:
+#
+#   python -m pytest tests
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # No window, no display server needed
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT) # The game modules live at the top of the repository
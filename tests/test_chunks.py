@@ -0,0 +1,49 @@
+# Tests of the chunked board: neighbour counts are right on both sides of
+# every chunk border and at the edges of the board, with and without NumPy.
+import pytest
+
+import grid_chunks
+from grid_chunks import CHUNK, CHUNK_BITS, CHUNK_MASK, MINE, ChunkedGame
+from grid_engine import MINES
+
+@pytest.fixture(params=["numpy", "python"])
+def counting(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(grid_chunks, "np", None)
+    elif grid_chunks.np is None:
+        pytest.skip("numpy is not installed")
+    return request.param
+
+def is_mine(game, r, c):
+    return bool(game.chunk(r >> CHUNK_BITS, c >> CHUNK_BITS)[((r & CHUNK_MASK) << CHUNK_BITS) | (c & CHUNK_MASK)] & MINE)
+
+def brute_force_count(game, r, c):
+    """
+    Counts the mines around (r, c) cell by cell, without the padded chunk grids.
+    """
+    return sum(
+        is_mine(game, nr, nc)
+        for nr in range(max(r - 1, 0), min(r + 2, game.size))
+        for nc in range(max(c - 1, 0), min(c + 2, game.size))
+        if nr != r or nc != c
+    )
+
+def test_counts_on_a_small_board(counting):
+    # 200 is not a multiple of the chunk size, so the last chunks are cut off by the board edge
+    game = ChunkedGame(3 * CHUNK + 8, 0.2, seed=5)
+    for r in range(game.size):
+        for c in range(game.size):
+            expected = MINES if is_mine(game, r, c) else brute_force_count(game, r, c)
+            assert game.value(r, c) == expected, (r, c)
+
+def test_counts_around_a_chunk_corner(counting):
+    # Far inside a huge world, where the four chunks meeting at a corner are generated on demand
+    game = ChunkedGame(10**6, 0.3, seed=9)
+    corner = 7813 * CHUNK # A chunk border row and column
+    for r in range(corner - 3, corner + 3):
+        for c in range(corner - 3, corner + 3):
+            expected = MINES if is_mine(game, r, c) else brute_force_count(game, r, c)
+            assert game.value(r, c) == expected, (r, c)
+    # Counting one chunk generated the mines of its neighbours, but only counted itself
+    assert (7813, 7813) in game.counted
+    assert len(game.counted) == 4
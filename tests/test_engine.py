@@ -0,0 +1,55 @@
+# Tests of the game engine: the scanline flood fill of reveal_cell opens
+# exactly the cells a plain breadth-first search would, flags included.
+import random
+from collections import deque
+
+import pytest
+
+from grid_engine import MINES, Grid_snifferGame
+
+def bfs_reveal(game, r, c):
+    """
+    Returns the cells revealing (r, c) should open, found with a plain
+    breadth-first search: undug, unflagged cells, spreading only from '0' cells.
+    """
+    size = game.size
+    if game.dug[r * size + c] or game.flagged[r][c]:
+        return set()
+    opened = {(r, c)}
+    queue = deque([(r, c)])
+    while queue:
+        r, c = queue.popleft()
+        if game.board[r][c] != 0:
+            continue # Numbers and mines don't spread
+        for nr in range(max(r - 1, 0), min(r + 2, size)):
+            for nc in range(max(c - 1, 0), min(c + 2, size)):
+                if (nr, nc) not in opened and not game.dug[nr * size + nc] and not game.flagged[nr][nc]:
+                    opened.add((nr, nc))
+                    queue.append((nr, nc))
+    return opened
+
+@pytest.mark.parametrize("seed", range(20))
+def test_flood_fill_matches_bfs(seed):
+    rng = random.Random(seed)
+    size = rng.choice([9, 16, 40, 100])
+    game = Grid_snifferGame(size, round(size * size * rng.choice([0.05, 0.1, 0.15])), seed=seed)
+    cells = [(r, c) for r in range(size) for c in range(size)]
+    # Flags on a few cells, mines or not, so the fill has to stop at them
+    for r, c in rng.sample(cells, size // 2):
+        game.toggle_flag(r, c)
+
+    safe = [(r, c) for r, c in cells if game.board[r][c] != MINES]
+    rng.shuffle(safe)
+    for r, c in safe[:20]:
+        expected = bfs_reveal(game, r, c)
+        revealed_safe = game.revealed_safe
+        opened = game.reveal_cell(r, c)
+        assert len(opened) == len(set(opened)) # No cell is reported twice
+        assert set(opened) == expected, (r, c)
+        assert game.revealed_safe == revealed_safe + len(expected)
+        for nr, nc in opened:
+            assert game.visible[nr][nc] and game.dug[nr * size + nc]
+
+    # The masks agree with each other after all those fills
+    assert all(bool(game.visible[r][c]) == bool(game.dug[r * size + c]) for r, c in cells)
+    assert game.revealed_safe == sum(game.dug)
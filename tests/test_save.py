@@ -0,0 +1,96 @@
+# Tests of the binary save format: a recording replays to the same game after
+# every move, and a file cut short at any byte either loads up to its last
+# whole move or is refused with a ValueError.
+import pytest
+
+from grid_engine import MINES, NOTHING, Grid_snifferGame
+from grid_save import MOVE, GameRecorder, SavedGame, game_state
+
+INTERVAL = 4 # Small, so the game spans several snapshots
+
+def snapshot(game):
+    """
+    Returns everything that makes up the state of a game, for comparisons.
+    """
+    return (bytes(game_state(game)), game.revealed_safe, game.flag_count, game.game_over, game.victory)
+
+@pytest.fixture
+def recording(tmp_path):
+    """
+    Plays a game to a win (flagging the mines of the first rows on the way,
+    and taking one flag back) and returns the path of its recording and the
+    state after every move.
+    """
+    game = Grid_snifferGame(9, 10, seed=4)
+    path = tmp_path / "game.gsr"
+    states = [snapshot(game)]
+    with open(path, "wb") as file:
+        recorder = GameRecorder(game, file, snapshot_interval=INTERVAL)
+        cells = [(r, c) for r in range(9) for c in range(9)]
+        moves = [("flag", r, c) for r, c in cells[:27] if game.board[r][c] == MINES]
+        moves.append(moves[0]) # Unflag
+        moves += [("dig", r, c) for r, c in cells if game.board[r][c] != MINES]
+        for action, r, c in moves:
+            result = game.toggle_flag(r, c) if action == "flag" else game.dig(r, c)
+            if result.event != NOTHING:
+                recorder.record(action, r, c, tick=len(states))
+                states.append(snapshot(game))
+    assert game.victory
+    return path, states
+
+def test_round_trip(recording):
+    path, states = recording
+    with SavedGame(path) as saved:
+        assert saved.move_count == len(states) - 1
+        assert saved.move_count > 2 * INTERVAL
+        board = saved.board()
+        assert board == [list(row) for row in Grid_snifferGame(9, 10, seed=4).board]
+        for moves, state in enumerate(states):
+            assert snapshot(saved.game_at(moves, board)) == state, moves
+        assert [move.tick for move in saved.moves()] == list(range(1, len(states)))
+
+def test_cut_in_header_mines_or_state(recording, tmp_path):
+    path, states = recording
+    data = path.read_bytes()
+    with SavedGame(path) as saved:
+        log_offset = saved.log_offset
+    cut = tmp_path / "cut.gsr"
+    for length in range(log_offset):
+        cut.write_bytes(data[:length])
+        with pytest.raises(ValueError):
+            SavedGame(cut)
+
+def test_cut_in_log(recording, tmp_path):
+    # Every cut point of the log: inside a move, between moves and inside a snapshot
+    path, states = recording
+    data = path.read_bytes()
+    with SavedGame(path) as saved:
+        log_offset = saved.log_offset
+        move_end = [saved.move_offset(i) + MOVE.size for i in range(saved.move_count)] # Where each move record ends
+    cut = tmp_path / "cut.gsr"
+    for length in range(log_offset, len(data) + 1):
+        cut.write_bytes(data[:length])
+        with SavedGame(cut) as saved:
+            whole = sum(1 for end in move_end if end <= length)
+            assert saved.move_count == whole, length
+            assert snapshot(saved.game_at()) == states[whole], length
+
+def test_two_moves_per_frame(tmp_path):
+    # The game loop can make several moves in one frame (clicks plus an
+    # auto-play step); a snapshot must hold the state after its own move only
+    grid_sniffer = pytest.importorskip("grid_sniffer")
+    game = Grid_snifferGame(9, 10, seed=4)
+    path = tmp_path / "game.gsr"
+    states = [snapshot(game)]
+    with open(path, "wb") as file:
+        recorder = GameRecorder(game, file, snapshot_interval=2)
+        # After the first frame every snapshot falls on the first move of a frame
+        frames = [(("flag", 0, 0),), (("flag", 0, 1), ("flag", 0, 2)), (("flag", 0, 0), ("flag", 1, 1)), (("flag", 0, 1), ("flag", 0, 2))]
+        for frame in frames:
+            for action, r, c in frame:
+                grid_sniffer.make_move(game, recorder, action, r, c)
+                states.append(snapshot(game))
+    with SavedGame(path) as saved:
+        assert saved.move_count == 7
+        for moves, state in enumerate(states):
+            assert snapshot(saved.game_at(moves)) == state, moves
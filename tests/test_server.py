@@ -0,0 +1,118 @@
+# Tests of the multiplayer server over localhost: the deltas a spectator
+# receives rebuild exactly the board the server holds, and a short load test
+# runs many sessions at once.
+import asyncio
+
+import grid_loadtest
+from grid_engine import MINES
+from grid_server import HEADER, JOIN_MSG, ERROR_MSG, PLAYER, SPECTATOR, MINE_CELL, FLAGGED_CELL, HIDDEN_CELL, GameClient, GameServer
+
+def server_cells(game):
+    """
+    Returns the board of a game as the CELL_VALUES bytes a client should hold.
+    """
+    cells = bytearray()
+    for r in range(game.size):
+        for c in range(game.size):
+            if game.visible[r][c]:
+                cells.append(MINE_CELL if game.board[r][c] == MINES else game.board[r][c])
+            else:
+                cells.append(FLAGGED_CELL if game.flagged[r][c] else HIDDEN_CELL)
+    return cells
+
+async def answer(client, request):
+    """
+    Reads frames until the one answering the given request and returns its move.
+    """
+    while True:
+        for move in await client.read_moves():
+            if move.player == client.welcome.player and move.request == request:
+                return move
+
+async def drain(client):
+    """
+    Reads frames until none arrive for a moment.
+    """
+    try:
+        while True:
+            await asyncio.wait_for(client.read_moves(), 0.1)
+    except asyncio.TimeoutError:
+        pass
+
+def test_spectator_follows_the_board():
+    async def run():
+        server = GameServer(tick_ms=5)
+        port = await server.start(port=0)
+        try:
+            alice, bob, watcher = GameClient(), GameClient(), GameClient()
+            for client, role in ((alice, PLAYER), (bob, PLAYER), (watcher, SPECTATOR)):
+                await client.connect(port=port)
+                await client.join(7, role, size=16, bombs=40, seed=3)
+            assert (alice.welcome.player, bob.welcome.player, watcher.welcome.player) == (1, 2, 0)
+            game = server.sessions[7].game
+
+            # Take turns until the game ends, with a flag now and then
+            request = 0
+            for turn in range(200):
+                client = (alice, bob)[turn % 2]
+                request += 1
+                i = client.board.cells.find(HIDDEN_CELL, (turn * 37) % 256)
+                if i == -1:
+                    i = client.board.cells.find(HIDDEN_CELL)
+                client.send("flag" if turn % 7 == 3 else "dig", i // 16, i % 16, request)
+                await answer(client, request)
+                if game.game_over:
+                    break
+            for client in (alice, bob, watcher):
+                await drain(client) # Let the last frames reach everyone
+            assert game.game_over
+            assert watcher.board.game_over
+
+            expected = server_cells(game)
+            assert alice.board.cells == bob.board.cells == expected
+            assert watcher.board.cells == expected
+            assert sum(watcher.board.scores.values()) == game.revealed_safe
+
+            # A late spectator is brought up to date by its first frame
+            late = GameClient()
+            await late.connect(port=port)
+            await late.join(7, SPECTATOR)
+            assert late.board.cells == expected
+
+            # A restart starts a new board for everyone
+            alice.send("restart", request=request + 1)
+            move = await answer(alice, request + 1)
+            assert move.event == "new"
+            assert server.sessions[7].game is not game
+            for client in (alice, bob, watcher, late):
+                await client.close()
+        finally:
+            await server.close()
+        assert not server.sessions # Sessions go away with their last client
+
+    asyncio.run(run())
+
+def test_oversized_message_is_refused():
+    # The server answers a header claiming a huge body at once, without waiting for the body
+    async def run():
+        server = GameServer(tick_ms=5)
+        port = await server.start(port=0)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(HEADER.pack(1 << 30, JOIN_MSG))
+            length, kind = HEADER.unpack(await asyncio.wait_for(reader.readexactly(HEADER.size), 5))
+            assert kind == ERROR_MSG
+            assert b"at most" in await reader.readexactly(length)
+            assert await reader.read() == b"" # Then it hangs up
+            writer.close()
+        finally:
+            await server.close()
+
+    asyncio.run(run())
+
+def test_load_many_sessions():
+    stats = asyncio.run(grid_loadtest.run_load(sessions=50, players=2, spectators=1, seconds=1.0, local=True, tick_ms=10))
+    assert stats["clients"] == 150
+    assert stats["actions"] > 50 * 2 # Every player got answers, more than once
+    assert stats["spectator_frames"] > 0
+    assert 0 < stats["latency_p50_ms"] <= stats["latency_p99_ms"]
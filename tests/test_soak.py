@@ -0,0 +1,110 @@
+# Soak test of the screen flow: plays thousands of rounds through the real
+# menu, game and game over scenes with scripted input (dummy video driver)
+# and checks that neither the call stack nor memory grows from round to round.
+import gc
+import sys
+import tracemalloc
+import weakref
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+import grid_sniffer
+from grid_engine import MINES
+
+ROUNDS = 2000 # Games played in total
+WARMUP = 200 # Games played before memory is measured, to fill caches such as the tile atlas
+MAX_GROWTH = 512 * 1024 # Bytes the measured rounds may add; keeping every game alive would add megabytes
+
+class FastClock:
+    """
+    Stands in for pygame.time.Clock so game frames do not wait for the 30 FPS cap.
+    """
+    def tick(self, framerate=0):
+        return 0
+
+class ScriptedPlayer:
+    """
+    Replaces wait_for_events and answers every screen with the clicks that
+    lead to the next one: Easy in the menu, all safe cells (or a mine every
+    other round) in the game, a key press to skip the reveal animation,
+    then alternately Play Again and Main Menu.
+    Quits from the menu once enough rounds were played.
+    """
+    def __init__(self, rounds):
+        self.rounds = rounds
+        self.played = 0
+        self.games = weakref.WeakSet() # Every game played that is still alive
+        self.depths = set() # Call stack depths seen while a scene waited for input
+
+    def click(self, pos, button=1):
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=button, pos=pos)
+
+    def __call__(self, busy=False):
+        pygame.event.get() # Drop the real events (window, timer), only scripted input counts
+        scene = grid_sniffer.SCENE # What the scene asking for input has on screen
+        depth = 0
+        caller = sys._getframe(1)
+        while caller is not None:
+            depth += 1
+            caller = caller.f_back
+        self.depths.add((scene["name"], depth))
+
+        if scene["name"] == "main_menu":
+            if self.played >= self.rounds:
+                return [pygame.event.Event(pygame.QUIT)]
+            return [self.click(scene["options"][0].center)] # Easy
+        if scene["name"] == "game_loop":
+            game = scene["game"]
+            if game.game_over:
+                return [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE)] # Skip the reveal animation
+            camera = scene["camera"]
+            self.games.add(game)
+            self.played += 1
+            lose = self.played % 2 == 0
+            cells = [
+                (r, c)
+                for r in range(game.size)
+                for c in range(game.size)
+                if (game.board[r][c] == MINES) == lose
+            ]
+            if lose:
+                cells = cells[:1]
+            return [self.click(camera.cell_rect(r, c).center) for r, c in cells]
+        # Game over screen
+        button = scene["play_again" if self.played % 4 else "main_menu"]
+        return [self.click(button.center)]
+
+@pytest.fixture
+def player(monkeypatch):
+    pygame.display.init()
+    pygame.font.init()
+    player = ScriptedPlayer(WARMUP)
+    monkeypatch.setattr(grid_sniffer, "wait_for_events", player)
+    monkeypatch.setattr(grid_sniffer, "NO_GUESS", False)
+    monkeypatch.setattr(pygame.time, "Clock", FastClock)
+    yield player
+    pygame.display.quit()
+    grid_sniffer.SCENE = {}
+
+def test_rounds_keep_stack_and_memory_flat(player):
+    grid_sniffer.run_scenes(grid_sniffer.main_menu) # Warm up
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        player.rounds = ROUNDS
+        grid_sniffer.run_scenes(grid_sniffer.main_menu)
+        gc.collect()
+        growth = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    assert player.played == ROUNDS
+    # Every scene waits at the same depth in every round: nothing nests
+    scenes = {scene for scene, depth in player.depths}
+    assert len(player.depths) == len(scenes) == 3
+    # Finished games are freed, and memory use does not creep up either
+    assert len(player.games) == 0
+    assert growth < MAX_GROWTH, f"memory grew by {growth} bytes over {ROUNDS - WARMUP} rounds"
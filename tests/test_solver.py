@@ -0,0 +1,98 @@
+# Tests of the solver: whatever it claims to have proven holds on the real
+# board, on games played from start to end with some wrong player flags, and
+# no-guess boards really are won from their start cell without guessing.
+import random
+
+import pytest
+
+from grid_engine import MINES, BOOM, Grid_snifferGame
+from grid_solver import NoGuessBoardPool, Solver, generate_no_guess_board, no_guess_board_source
+
+def is_mine(game, i):
+    return game.board[i // game.size][i % game.size] == MINES
+
+@pytest.mark.parametrize("seed", range(30))
+def test_hints_are_sound(seed):
+    rng = random.Random(seed)
+    size, bombs = rng.choice([(9, 10), (16, 40), (16, 60), (30, 150)])
+    game = Grid_snifferGame(size, bombs, seed=seed, safe_first_click=True)
+    game.dig(size // 2, size // 2)
+    solver = Solver(game)
+    # A few wrong flags on safe cells, which the solver must not trust
+    hidden_safe = [(r, c) for r in range(size) for c in range(size) if not game.visible[r][c] and game.board[r][c] != MINES]
+    for r, c in rng.sample(hidden_safe, min(3, len(hidden_safe))):
+        game.toggle_flag(r, c)
+
+    proven = 0
+    while not game.game_over:
+        hint = solver.hint()
+        assert hint is not None
+        mine = game.board[hint.r][hint.c] == MINES
+        if hint.action == "dig":
+            assert not mine, hint
+            proven += 1
+        elif hint.action == "flag":
+            assert mine, hint
+            proven += 1
+        elif hint.action == "unflag" and hint.probability == 0.0:
+            assert not mine, hint # Proven safe under a player flag
+        # Everything proven so far holds too
+        assert not any(is_mine(game, i) for i in solver.safe)
+        assert all(is_mine(game, i) for i in solver.mines)
+
+        if hint.action in ("flag", "unflag"):
+            game.toggle_flag(hint.r, hint.c)
+        else:
+            game.dig(hint.r, hint.c)
+    assert proven > 0
+
+def start_region_is_safe(board, start):
+    """
+    Returns True if the start cell is a '0', so its neighbours hold no mines either.
+    """
+    return board[start[0]][start[1]] == 0
+
+@pytest.mark.parametrize("seed", range(20))
+def test_no_guess_board_is_won_without_guessing(seed):
+    rng = random.Random(seed)
+    size, bombs = rng.choice([(9, 10), (16, 40), (30, 150)])
+    start = (rng.randrange(size), rng.randrange(size))
+    board = generate_no_guess_board(size, bombs, start, seed)
+    assert board is not None
+    assert sum(value == MINES for row in board for value in row) == bombs
+    assert start_region_is_safe(board, start)
+
+    # A fresh game on that board: the first click opens a region, the solver does the rest
+    game = Grid_snifferGame(size, bombs, safe_first_click=True)
+    game.adopt_board(board)
+    assert len(game.dig(*start).cells) > 1
+    Solver(game).auto_play(guess=False)
+    assert game.victory
+
+@pytest.mark.parametrize("seed", range(3))
+def test_no_guess_source_falls_back_at_high_density(seed):
+    # Far too dense for a no-guess board, so a plain safe-first-click board comes back
+    size, bombs, start = 9, 60, (4, 4)
+    assert generate_no_guess_board(size, bombs, start, seed) is None
+    board = no_guess_board_source(size, bombs, start, seed)
+    assert sum(value == MINES for row in board for value in row) == bombs
+    assert start_region_is_safe(board, start)
+    game = Grid_snifferGame(size, bombs, board_source=no_guess_board_source)
+    assert game.dig(*start).event != BOOM
+
+@pytest.mark.parametrize("size, bombs", [(9, 10), (16, 40)])
+def test_pool_games_start_opened(size, bombs):
+    pool = NoGuessBoardPool(depth=1)
+    try:
+        pool.prefill(size, bombs)
+        pool.queues[(size, bombs)][0].result() # Wait for the worker
+        game = pool.new_game(size, bombs)
+    finally:
+        pool.close()
+    assert game is not None
+    assert not game.game_over
+    assert game.revealed_safe > 1 # The start region is open already
+    opened = [(r, c) for r in range(size) for c in range(size) if game.visible[r][c]]
+    assert any(game.board[r][c] == 0 for r, c in opened)
+    Solver(game).auto_play(guess=False)
+    assert game.victory